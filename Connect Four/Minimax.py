@@ -1,9 +1,24 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from bitboard import Position, count_streaks, BOARD_CELLS
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from ordering import MoveOrderer, CENTER_ORDER
+from evaluation import EvaluatedPosition, LINE_INDICES, STREAK_WEIGHTS
+from solver import Solver
+from book import OpeningBook
+from mcts import MonteCarloTree, search_tree
+from stats import SearchStats
+from tactics import tactical_moves
 """
 Used Alpha-Beta Pruning to optimize Minimax algorithm.
 The algorithm checks the maximizers and minimizers and when it isn't possible to beat a better option,
 it stops searching and moves onto the next options.
 I evaluate the board by counting the length and number of streaks (i.e. 3 in a row is worth more than 2 in a row).
+The search can run on the numpy board or on a bitboard Position, which is much faster.
 """
 BOARD_COLS = 7
 BOARD_ROWS = 6
@@ -22,6 +37,7 @@ class State:
         self.p2 = p2
         self.isEnd = False
         self.playerSymbol = 1
+        self.ply = 0 #Discs on the board
     def showBoard(self):
         """
         Objective: Print the board for the user
@@ -48,7 +64,8 @@ class State:
             p1_action = self.p1.bestMove(self.board)
             self.board[p1_action] = self.playerSymbol
             self.playerSymbol *= -1
-            result, self.isEnd = checkWinner(self.board)
+            self.ply += 1
+            result, self.isEnd = checkWinner(self.board, p1_action, self.ply)
             self.showBoard()
             if result is not None:
                 if result == AI:
@@ -59,11 +76,14 @@ class State:
                     print('Draw')
                 self.isEnd = True
                 return
+            if getattr(self.p1, 'pondering', False):
+                self.p1.ponder(self.board) #Think while the human does
             p2_action = self.p2.move(self.board, self.playerSymbol)
             self.board[p2_action] = self.playerSymbol
             self.playerSymbol *= -1
+            self.ply += 1
             self.showBoard()
-            result, self.isEnd = checkWinner(self.board)
+            result, self.isEnd = checkWinner(self.board, p2_action, self.ply)
             if result is not None:
                 if result == AI:
                     print('Computer wins!')
@@ -106,103 +126,554 @@ def valid_move(board, column):
     return None
 #Represents the rewards that will influence the bot's decisions
 
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the budget for the current move runs out
+    """
+
+class SearchBudget:
+    """
+    Time and node limits for one move.
+    The search calls tick at every node, which raises SearchTimeout once either limit is reached.
+    """
+    def __init__(self, time_limit=None, node_limit=None):
+        """
+        Inputs: time_limit in seconds, node_limit in nodes, None for no limit
+        """
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.node_limit = node_limit
+        self.nodes = 0
+    def tick(self):
+        """
+        Objective: Count a node and stop the search if the budget is spent.
+        The clock is only read every 256 nodes, reading it is slower than a node.
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchTimeout
+        if self.deadline is not None and not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+    def stop(self):
+        """
+        Objective: Spend the budget now, the search stops at its next clock check. Safe to call from another thread.
+        """
+        self.deadline = 0
+
 class Computer:
     """
     Represents the computer we will be playing against
     """
-    def __init__(self, name):
+    def __init__(self, name, bitboard=True, table_size=1 << 18, depth=DEPTH, time_limit=None, node_limit=None, ordering=True, incremental=True, workers=1, solve_threshold=18, book=None, stats=False, max_depth=None, pondering=False, table=None, table_file=None, tactics=True):
         """
-        Inputs: name
+        Inputs: name, bitboard to search on a bitboard Position instead of the numpy board,
+                table_size, number of transposition table entries kept by the bitboard search,
+                depth, the fixed search depth,
+                time_limit (seconds) and node_limit per move, either one switches the bitboard
+                search to iterative deepening within that budget instead of the fixed depth,
+                ordering to order moves in the bitboard search (center-out, killers, history),
+                incremental to keep the evaluation up to date move by move instead of rescanning leaves,
+                workers, number of processes searching root moves in parallel,
+                solve_threshold, below this many empty cells the exact solver plays instead (0 to turn it off),
+                within the same time and node limits, it and its table are only created once it is first needed,
+                book, path of an opening book file (see book.py) or an OpeningBook,
+                stats, to collect search statistics (see stats.py), bestMove then returns them with the move,
+                max_depth, deepest iteration of iterative deepening, also switches to it when set, None for no limit,
+                pondering, to search on the human's time, State.play then calls ponder after every computer move,
+                table, a TranspositionTable to use instead of a new one, so games played one after another
+                by several Computers share what was searched (not for Computers searching at the same time),
+                table_file, path of a saved transposition table, loaded now if it exists and saved by close,
+                tactics, to check for immediate wins, blocks and double threats before searching (see tactics.py),
+                forced moves are then played without a search and moves that lose at once are not searched
         Objective: Initialize Computer with a name
         """
         self.name = name
+        self.bitboard = bitboard
+        self.table = TranspositionTable(table_size) if table is None else table
+        self.table_file = table_file
+        self.tactics = tactics
+        if table_file is not None and os.path.exists(table_file):
+            self.table.load(table_file)
+        self.depth = depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.depth_reached = None #Deepest iteration finished on the last move
+        self.max_depth = max_depth
+        self.budget = None #SearchBudget of the last iterative deepening, for stop and its node count
+        self.score = None #Score of the last move, None if it came from the opening book
+        self.orderer = MoveOrderer() if ordering else None
+        self.incremental = incremental
+        self.workers = workers
+        self.table_size = table_size
+        self.pool = None #Started on the first parallel search
+        self.shared_alpha = None
+        self.solve_threshold = solve_threshold
+        self.solver = None #Created by solveMove the first time the endgame is reached
+        self.solved_score = None #Exact score of the last move if the solver played it
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self.collect_stats = stats
+        self.stats = None #SearchStats of the last move when collecting them
+        self.pondering = pondering
+        self.pondered = {} #(ai, player) bitmasks after each human reply to (column, score, depth) of the answer
+        self.ponder_thread = None
+        self.ponder_budget = None
+    def close(self):
+        """
+        Objective: Stop pondering, shut down the worker processes of the parallel search
+        and save the transposition table to table_file if there is one
+        """
+        self.stopPondering()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.table_file is not None:
+            self.table.save(self.table_file)
+    def stop(self):
+        """
+        Objective: From another thread, end the iterative deepening in progress. bestMove then returns
+        the best move of the deepest iteration finished. Parallel root moves already sent to the
+        worker processes still run until their own time limit.
+        """
+        budget = self.budget
+        if budget is not None:
+            budget.stop()
+    def ponder(self, board):
+        """
+        Input: state of given board with the human to move, either a numpy board or a Position
+        Objective: Start thinking on the human's time. A background thread searches the answer to every
+        reply of the human, all of them at depth 1, then all at depth 2, and so on, so however long the
+        human takes, every reply has been searched about as deep. The answers are kept in pondered and the
+        transposition table. bestMove stops the thread, then plays the pondered answer at once if it was
+        searched to its full depth, or else searches with the table already warm.
+        """
+        self.stopPondering()
+        self.pondered = {}
+        if not self.bitboard:
+            return
+        board = board.to_board() if isinstance(board, Position) else board
+        position = (EvaluatedPosition if self.incremental else Position).from_board(board)
+        if BOARD_CELLS - position.moves - 1 < self.solve_threshold:
+            return #The solver plays the next move, there is nothing to search
+        self.stats = None #Pondering is not part of the next move's statistics
+        self.ponder_budget = SearchBudget()
+        self.ponder_thread = threading.Thread(target=self.ponderReplies, args=(position, self.ponder_budget), daemon=True)
+        self.ponder_thread.start()
+    def ponderReplies(self, position, budget):
+        """
+        Inputs: Position with the human to move, SearchBudget that stopPondering spends
+        Objective: Run in the pondering thread, search the answer to each reply at increasing depths
+        until the depth bestMove would search to, or until stopped. The search stays in this process,
+        even with several workers, so stopPondering returns as soon as the current node is done.
+        """
+        last_depth = self.targetDepth() or BOARD_CELLS
+        replies = [col for col in CENTER_ORDER if position.can_play(col)]
+        try:
+            for depth in range(1, last_depth + 1):
+                for reply in replies:
+                    position.play(reply, PLAYER)
+                    key = (position.ai, position.player)
+                    if position.winner() is None and depth < BOARD_CELLS - position.moves:
+                        first = self.pondered[key][0] if key in self.pondered else None
+                        #In this process only, stopPondering cannot interrupt root moves already sent to the workers
+                        col, score = self.searchRoot(position.copy(), depth, budget, first, parallel=False)
+                        self.pondered[key] = (col, score, depth)
+                    position.undo(reply)
+        except SearchTimeout:
+            pass
+    def stopPondering(self):
+        """
+        Objective: Stop the pondering thread, if any, and wait for it, so the tables are free for the next search
+        """
+        if self.ponder_thread is not None:
+            self.ponder_budget.stop()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+    def targetDepth(self):
+        """
+        Returns: the depth bestMove searches to, None if it searches until a time or node limit instead
+        """
+        if self.time_limit is None and self.node_limit is None and self.max_depth is None:
+            return self.depth
+        return self.max_depth
     def bestMove(self, board):
         """
-        Inputs: state of given board
-        Return: tuple representing the cell the computer should move
+        Inputs: state of given board, either a numpy board or a Position
+        Return: tuple representing the cell the computer should move,
+                when collecting stats, a tuple of that cell and the dict of search statistics
         Objective: Decides computer's best move, using minimax algo
         """
-        best_score = -float('inf')
-        #Starts at the bottom of the board and checks up, takes into account gravity
-        for i in range(BOARD_COLS):
-            for j in range(BOARD_ROWS - 1, -1, -1):
-                #Check if spot available
-                if board[j][i] == 0:
-                    board[j][i] = AI
-                    score = minimax(board, DEPTH, False, -float('inf'), float('inf'))
-                    board[j][i] = 0
-                    if score > best_score:
-                        best_score = score
-                        best_move = (j, i)
-                    break
-        board[best_move] = AI
+        if self.bitboard or isinstance(board, Position):
+            best_move = self.bestMovePosition(board)
+        else:
+            ply = np.count_nonzero(board) + 1 #Discs once the computer has moved
+            position = Position.from_board(board)
+            forced, moves = tactical_moves(position, AI) if self.tactics else (None, None)
+            if self.collect_stats:
+                self.stats = SearchStats(ply - 1)
+                if forced is None:
+                    self.stats.start_iteration(self.depth)
+            best_score = -float('inf')
+            if forced is not None:
+                #Settled by the tactical checks, nothing to search
+                best_move = (position.landing_row(forced), forced)
+                moves = []
+            #Starts at the bottom of the board and checks up, takes into account gravity
+            for i in range(BOARD_COLS):
+                if moves is not None and i not in moves:
+                    continue
+                for j in range(BOARD_ROWS - 1, -1, -1):
+                    #Check if spot available
+                    if board[j][i] == 0:
+                        board[j][i] = AI
+                        score = minimax(board, self.depth, False, -float('inf'), float('inf'), stats=self.stats, last=(j, i), ply=ply)
+                        board[j][i] = 0
+                        if score > best_score:
+                            best_score = score
+                            best_move = (j, i)
+                        break
+            board[best_move] = AI
+            if self.stats is not None:
+                self.stats.solved = forced is not None
+                self.stats.depth = None if self.stats.solved else self.depth
+                self.stats.pv = [best_move[1]]
+        if self.collect_stats:
+            return best_move, self.stats.report()
         return best_move
+    def bestMovePosition(self, board):
+        """
+        Inputs: state of given board, either a numpy board or a Position
+        Return: tuple representing the cell the computer should move
+        Objective: Same as bestMove, but the search runs on a bitboard Position
+        """
+        if isinstance(board, Position):
+            position = board
+            if self.incremental and not isinstance(board, EvaluatedPosition):
+                position = EvaluatedPosition.from_board(board.to_board())
+        else:
+            position = (EvaluatedPosition if self.incremental else Position).from_board(board)
+        self.stopPondering()
+        pondered = self.pondered.get((position.ai, position.player))
+        self.pondered = {}
+        target_depth = self.targetDepth()
+        self.solved_score = None
+        self.budget = None
+        if self.collect_stats:
+            self.stats = SearchStats(position.moves)
+        if self.orderer is not None:
+            self.orderer.new_search()
+        self.table.new_search()
+        forced, moves = tactical_moves(position, AI) if self.tactics else (None, None)
+        col = None
+        solved = None
+        interrupted = None #Budget the solver ran out of, the search then gets what is left of it
+        if self.book is not None:
+            col = self.book.lookup(position, AI)
+        if col is None and BOARD_CELLS - position.moves < self.solve_threshold:
+            #Few enough moves left to play perfectly
+            solved = self.solveMove(position)
+            if solved is None:
+                interrupted = self.budget
+        if col is not None:
+            self.score = None
+        elif solved is not None:
+            col = solved
+            self.score = self.solved_score
+            self.depth_reached = None
+        elif forced is not None:
+            #Settled by the tactical checks, scored by the evaluation of the position it leads to
+            col = forced
+            position.play(col, AI)
+            self.score = score_position(position, position.winner())
+            position.undo(col)
+            self.depth_reached = 0
+        elif pondered is not None and target_depth is not None and pondered[2] >= target_depth and (moves is None or pondered[0] in moves):
+            #Already searched on the human's time
+            col, self.score, self.depth_reached = pondered
+        elif self.time_limit is None and self.node_limit is None and self.max_depth is None and interrupted is None:
+            col, self.score = self.searchRoot(position, self.depth, moves=moves)
+            self.depth_reached = self.depth
+        else:
+            col = self.iterativeDeepening(position, moves, interrupted)
+        if self.stats is not None:
+            self.stats.solved = not self.stats.iterations
+            self.stats.depth = None if self.stats.solved else self.depth_reached
+            self.stats.pv = [col] if self.stats.solved else self.principalVariation(position, col)
+        best_move = (position.landing_row(col), col)
+        if isinstance(board, Position):
+            board.play(col, AI)
+        else:
+            board[best_move] = AI
+        return best_move
+    def searchRoot(self, position, depth, budget=None, first=None, moves=None, parallel=True):
+        """
+        Inputs: Position with the computer to move, depth, optional SearchBudget,
+                first, a column to try before the others,
+                moves, the columns to search, every playable one if None,
+                parallel, False to search in this process even with several workers
+        Returns: best column and its score
+        Objective: Search every root move, using one below the best score so far as alpha. Later moves
+        only have to prove they are worse, not by how much, while moves that tie the best still get
+        their exact score, so ties are broken center-out whatever order the moves were searched in.
+        """
+        if self.orderer is not None:
+            columns = self.orderer.order(position, AI, first)
+        else:
+            columns = [col for col in range(BOARD_COLS) if position.can_play(col)]
+            if first is not None:
+                columns = [first] + [col for col in columns if col != first]
+        if moves is not None:
+            columns = [col for col in columns if col in moves]
+        if self.stats is not None:
+            self.stats.start_iteration(depth)
+        if parallel and self.workers > 1 and len(columns) > 1:
+            scores = self.searchRootParallel(position, columns, depth, budget)
+        else:
+            scores = {}
+            best_score = -float('inf')
+            for col in columns:
+                position.play(col, AI)
+                scores[col] = minimax(position, depth, False, best_score - 1, float('inf'), self.table, budget, self.orderer, self.stats)
+                position.undo(col)
+                best_score = max(best_score, scores[col])
+        return pick_move(scores)
+    def searchRootParallel(self, position, columns, depth, budget=None):
+        """
+        Inputs: Position with the computer to move, playable columns in search order, depth, optional SearchBudget
+        Returns: dict of column to score, exact for every move that reaches the best score
+        Objective: Search the first move here to get a good alpha, then hand the others to the process pool.
+        The workers share the best score found so far, so moves started later are searched with a tighter alpha.
+        Search statistics only cover the first move, the one searched in this process.
+        """
+        if self.pool is None:
+            self.shared_alpha = multiprocessing.Value('d', -float('inf'))
+            self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.shared_alpha, self.table_size))
+        first = columns[0]
+        position.play(first, AI)
+        scores = {first: minimax(position, depth, False, -float('inf'), float('inf'), self.table, budget, self.orderer, self.stats)}
+        position.undo(first)
+        with self.shared_alpha.get_lock():
+            self.shared_alpha.value = scores[first]
+        time_left = None
+        if budget is not None and budget.deadline is not None:
+            time_left = budget.deadline - time.perf_counter()
+        board = position.to_board()
+        futures = [self.pool.submit(search_root_move, board, col, depth, self.incremental, time_left) for col in columns[1:]]
+        for future in futures:
+            col, score = future.result()
+            if score is None:
+                for pending in futures:
+                    pending.cancel()
+                raise SearchTimeout
+            scores[col] = score
+        return scores
+    def solveMove(self, position):
+        """
+        Input: Position with the computer to move
+        Returns: column of an optimal move, with its exact score in solved_score,
+                 or None if the time or node limit ran out, or stop was called, before it was solved
+        Objective: Solve the position within the budget of the move. The solver is created on first use,
+        as its table is large and many games never reach the endgame.
+        """
+        if self.solver is None:
+            self.solver = Solver()
+        self.budget = SearchBudget(self.time_limit, self.node_limit)
+        try:
+            col, self.solved_score = self.solver.best_move(position, AI, self.budget)
+        except SearchTimeout:
+            self.solved_score = None
+            return None
+        return col
+    def iterativeDeepening(self, position, moves=None, budget=None):
+        """
+        Inputs: Position with the computer to move, the columns to search, every playable one if None,
+                budget, SearchBudget already partly spent, a new one for the time and node limits if None
+        Returns: best column from the deepest search finished within the time and node limits
+        Objective: Search depth 1, 2, 3... until the budget runs out, stop is called, or max_depth is done.
+        The best move of each iteration is tried first in the next one, and the transposition table carries the rest over.
+        """
+        budget = self.budget = SearchBudget(self.time_limit, self.node_limit) if budget is None else budget
+        best_col = None
+        self.depth_reached = None
+        last_depth = BOARD_CELLS - position.moves - 1
+        if self.max_depth is not None:
+            last_depth = min(last_depth, self.max_depth)
+        for depth in range(1, last_depth + 1):
+            try:
+                #Search a copy, an interrupted search leaves its moves on the board
+                best_col, self.score = self.searchRoot(position.copy(), depth, budget, best_col, moves)
+            except SearchTimeout:
+                break
+            self.depth_reached = depth
+        if best_col is None:
+            #Not even depth 1 finished, fall back to the static evaluation of each move
+            best_col, self.score = self.searchRoot(position, 0, moves=moves)
+            self.depth_reached = 0
+        return best_col
+    def principalVariation(self, position, col):
+        """
+        Inputs: Position with the computer to move, the column it plays
+        Returns: list of columns, the move played and the best replies after it stored in the transposition table
+        """
+        position = position.copy()
+        pv = [col]
+        position.play(col, AI)
+        symbol = PLAYER
+        while position.winner() is None and len(pv) <= self.depth_reached:
+            entry = self.table.probe(position.hash(symbol))
+            if entry is None or entry[3] is None or not position.can_play(entry[3]):
+                break
+            position.play(entry[3], symbol)
+            pv.append(entry[3])
+            symbol = -symbol
+        return pv
 
-def check_lines(board, x, y, num):
+class MonteCarlo:
     """
-    Checks the number of pieces in a row for the player or bot
-    Use it to check 2, 3, and 4 in a row
-    Helper function as sliding window to check entire board
+    Computer that plays by Monte Carlo tree search instead of minimax, see mcts.py
     """
-    hori = 0
-    vert = 0
-    diag_sum1 = 0
-    diag_sum2 = 0
-    for i in range(x, x + num):
-        for j in range(y, y + num):
-            hori += board[i][j]
-        if hori == num:
-            return AI
-        if hori == -num:
-            return PLAYER
-        hori = 0
-    for i in range(y, y + num):
-        for j in range(x, x + num):
-            vert += board[j][i]
-        if vert == num:
-            return AI
-        if vert == -num:
-            return PLAYER
-        vert = 0
-    for i in range(num):
-        diag_sum1 += board[x + i][y + i]
-    if diag_sum1 == num:
-        return AI
-    if diag_sum1 == -num:
-        return PLAYER
-    for i in range(num):
-        diag_sum2 += board[x + i][num + y - i - 1]
-    if diag_sum2 == num:
-        return AI
-    if diag_sum2 == -num:
-        return PLAYER
-    return None
-def checkWinner(board):
+    def __init__(self, name, iterations=1000, time_limit=None, batch_size=64, exploration=1.4, workers=1, seed=None):
+        """
+        Inputs: name, iterations and/or time_limit (seconds) per move, batch_size random games per iteration,
+                exploration constant of UCT, workers, number of processes each growing their own tree,
+                seed of the random generator
         """
-        Input: state of board
+        self.name = name
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.workers = workers
+        self.rng = np.random.default_rng(seed)
+        self.pool = None
+    def close(self):
+        """
+        Objective: Shut down the worker processes
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+    def bestMove(self, board):
+        """
+        Inputs: state of given board, either a numpy board or a Position
+        Return: tuple representing the cell the computer should move
+        Objective: Grow the tree and play the root move with the most playouts. With several workers,
+        every process grows an independent tree and their playout counts are added up.
+        """
+        position = board if isinstance(board, Position) else Position.from_board(board)
+        if self.workers > 1:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(self.workers)
+            numpy_board = position.to_board()
+            futures = [self.pool.submit(search_tree, numpy_board, AI, self.iterations, self.time_limit,
+                                        self.batch_size, self.exploration, int(self.rng.integers(1 << 62)))
+                       for worker in range(self.workers)]
+            visits = sum(future.result() for future in futures)
+        else:
+            tree = MonteCarloTree(position, AI, self.batch_size, self.exploration, seed=int(self.rng.integers(1 << 62)))
+            tree.run(self.iterations, self.time_limit)
+            visits = tree.root_visits()
+        col = int(visits.argmax())
+        best_move = (position.landing_row(col), col)
+        if isinstance(board, Position):
+            board.play(col, AI)
+        else:
+            board[best_move] = AI
+        return best_move
+
+def pick_move(scores):
+    """
+    Input: dict of root column to score
+    Returns: best column and its score, ties going to the column closest to the center
+    """
+    best_score = max(scores.values())
+    best_col = min((col for col in scores if scores[col] == best_score), key=CENTER_ORDER.index)
+    return best_col, best_score
+
+#State of a parallel search worker process, set by init_worker
+worker_alpha = None
+worker_table = None
+worker_orderer = None
+
+def init_worker(shared_alpha, table_size):
+    """
+    Inputs: shared best root score, transposition table size
+    Objective: Give the worker process its own table and move orderer, kept between tasks
+    """
+    global worker_alpha, worker_table, worker_orderer
+    worker_alpha = shared_alpha
+    worker_table = TranspositionTable(table_size)
+    worker_orderer = MoveOrderer()
+
+def search_root_move(board, col, depth, incremental, time_left):
+    """
+    Inputs: numpy board with the computer to move, root column, depth,
+            incremental to search an EvaluatedPosition, time_left in seconds or None
+    Returns: the column and its score, or None as the score if time ran out
+    Objective: Run in a worker process, search one root move with the best score found so far as alpha
+    """
+    position = (EvaluatedPosition if incremental else Position).from_board(board)
+    position.play(col, AI)
+    alpha = worker_alpha.value
+    budget = None if time_left is None else SearchBudget(time_left)
+    try:
+        score = minimax(position, depth, False, alpha - 1, float('inf'), worker_table, budget, worker_orderer)
+    except SearchTimeout:
+        return col, None
+    with worker_alpha.get_lock():
+        if score > worker_alpha.value:
+            worker_alpha.value = score
+    return col, score
+
+def checkWinner(board, last=None, ply=None):
+        """
+        Input: state of board,
+               optionally the (row, col) of the last disc played and the number of discs on the board.
+               Only lines through the last disc can have become four in a row, and the board is full
+               once there are 42 discs, so with them only the four directions through that disc are checked.
+               The board must not have had a winner before the last disc.
         Returns: 1 or -1, depending on if X or O won, respectively
                 0 if draw
                 None if game is still in progress
         Objective: check the result of the board, see the outcome
         """
-        #Does a 4x4 window and scans entire board
-        for i in range(BOARD_ROWS - 3):
-            for j in range(BOARD_COLS - 3):
-                result = check_lines(board, i, j, 4)
-                if result == 1:
-                    return AI, True
-                elif result == -1:
-                    return PLAYER, True
-        for i in range(BOARD_ROWS):
-            for j in range(BOARD_COLS):
-                if board[i][j] == 0:
-                    draw = False
-                    break
-            if not draw:
-                break
-        if draw:
+        if isinstance(board, Position):
+            result = board.winner()
+            return result, result is not None
+        if last is not None:
+            if wins_through(board, last[0], last[1]):
+                return (AI if board.item(last[0], last[1]) == AI else PLAYER), True
+            if ply == BOARD_CELLS:
+                return 0, True
+            return None, False
+        #Gathers every line of 4 at once, a line summing to 4 or -4 is a win
+        cells = np.asarray(board).reshape(-1)
+        sums = cells[LINE_INDICES[4]].sum(axis=1)
+        if (sums == 4).any():
+            return AI, True
+        elif (sums == -4).any():
+            return PLAYER, True
+        if not (cells == 0).any():
             return 0, True
         return None, False
+def wins_through(board, row, col):
+    """
+    Inputs: numpy board, row and column of a disc
+    Returns: True if the disc is part of four in a row
+    Objective: Count the same discs on both sides of it in each of the four directions
+    """
+    symbol = board.item(row, col)
+    for row_step, col_step in ((1, 0), (0, 1), (1, 1), (1, -1)):
+        count = 1
+        for direction in (1, -1):
+            i = row + direction * row_step
+            j = col + direction * col_step
+            while 0 <= i < BOARD_ROWS and 0 <= j < BOARD_COLS and board.item(i, j) == symbol:
+                count += 1
+                i += direction * row_step
+                j += direction * col_step
+        if count >= 4:
+            return True
+    return False
+
 def evaluate_board(board):
     """
     There's many ways to evaluate the board.
@@ -214,58 +685,75 @@ def evaluate_board(board):
     Others ways to evaluate board
     """
     result, _ = checkWinner(board)
+    if isinstance(board, Position):
+        return score_position(board, result)
+    return score_board(board, result)
+
+def score_board(board, result):
+    """
+    Inputs: numpy board, and its result as returned by checkWinner
+    Returns: the evaluate_board score, without checking the winner again
+    """
     if result == PLAYER:
         return -100000
     elif result == 0:
         return 0
     else:
-        AI_fours = 0
-        AI_threes = 0
-        AI_twos = 0
-        P_fours = 0
-        P_threes = 0
-        P_twos = 0
-        #Check how many fours in a row
-        for i in range(BOARD_ROWS - 3):
-            for j in range(BOARD_COLS - 3):
-                result = check_lines(board, i, j, 4)
-                if result == AI:
-                    AI_fours += 1
-                if result == PLAYER:
-                    P_fours += 1
-        #Check how many three in a row
-        for i in range(BOARD_ROWS - 2):
-            for j in range(BOARD_COLS - 2):
-                result = check_lines(board, i, j, 3)
-                if result == AI:
-                    AI_threes += 1
-                if result == PLAYER:
-                    P_threes += 1
-        #Check how many two in a row
-        for i in range(BOARD_ROWS - 1):
-            for j in range(BOARD_COLS - 1):
-                result = check_lines(board, i, j, 2)
-                if result == AI:
-                    AI_twos += 1
-                if result == PLAYER:
-                    P_twos += 1
-        
-        return (100000*AI_fours + 100*AI_threes + AI_twos - 100000*P_fours - 100*P_threes - P_twos)
+        #For each length, gather every line of that length and count the ones fully owned by either side
+        cells = np.asarray(board).reshape(-1)
+        score = 0
+        for length, weight in STREAK_WEIGHTS.items():
+            sums = cells[LINE_INDICES[length]].sum(axis=1)
+            score += weight * (np.count_nonzero(sums == length) - np.count_nonzero(sums == -length))
+        return int(score)
+
+def score_position(position, result):
+    """
+    Inputs: Position, and its result as returned by checkWinner
+    Returns: the evaluate_board score, without checking the winner again
+    """
+    if result == PLAYER:
+        return -100000
+    elif result == 0:
+        return 0
+    elif isinstance(position, EvaluatedPosition):
+        return position.score
+    #Counts every streak in every direction with shifts instead of sliding windows
+    AI_score = 100000*count_streaks(position.ai, 4) + 100*count_streaks(position.ai, 3) + count_streaks(position.ai, 2)
+    P_score = 100000*count_streaks(position.player, 4) + 100*count_streaks(position.player, 3) + count_streaks(position.player, 2)
+    return AI_score - P_score
 
-def minimax(board, depth, isMaximizing, alpha, beta):
+def minimax(board, depth, isMaximizing, alpha, beta, table=None, budget=None, orderer=None, stats=None, last=None, ply=None):
     """
     Inputs: state of board, 
             depth indicating level of tree, 
             isMaximizing to denote if minimizing or maximizing player, 
             alpha represents the minimum score that the maximizing player is guaranteed 
             beta represents the maximum score that the minimizing player is guaranteed
+            table, optional TranspositionTable used when board is a Position
+            budget, optional SearchBudget used when board is a Position
+            orderer, optional MoveOrderer used when board is a Position
+            stats, optional SearchStats collecting counts and timings
+            last and ply, the (row, col) of the last disc played and the number of discs, so the numpy board
+            is only checked for a win through that disc. Without them the whole board is checked once,
+            then the moves below pass them on.
     Returns: best score from after running minimax on the given board
     Objective: Runs minimax with alpha beta pruning to check best move for computer
 
     """
-    current_result, _ = checkWinner(board)
+    if isinstance(board, Position):
+        return search(board, depth, isMaximizing, alpha, beta, table, budget, orderer, stats)
+    if ply is None:
+        ply = np.count_nonzero(board)
+    if stats is not None:
+        stats.node(ply)
+        current_result, _ = stats.winner(checkWinner, board, last, ply)
+    else:
+        current_result, _ = checkWinner(board, last, ply)
     if depth == 0 or current_result is not None: #If game done, return score
-        return evaluate_board(board)
+        if stats is not None:
+            return stats.evaluate(score_board, board, current_result)
+        return score_board(board, current_result)
     if isMaximizing: #Finds best move if AI is next, maximize score
         best_score = -float('inf')
         for i in range(BOARD_COLS):
@@ -273,11 +761,13 @@ def minimax(board, depth, isMaximizing, alpha, beta):
                 #Check if spot available
                 if board[j][i] == 0:
                     board[j][i] = AI
-                    score = minimax(board, depth-1, False, alpha, beta)
+                    score = minimax(board, depth-1, False, alpha, beta, stats=stats, last=(j, i), ply=ply + 1)
                     board[j][i] = 0
                     best_score = max(score , best_score) #We want the AI to win ASAP
                     alpha = max(alpha, best_score) #Maximize score, best explored option for maximizer from the current state
                     if alpha >= beta: #A better option exists so prune 
+                        if stats is not None:
+                            stats.cutoff(i)
                         return best_score
                     break
         return best_score
@@ -288,28 +778,127 @@ def minimax(board, depth, isMaximizing, alpha, beta):
                 #Check if spot available
                 if board[j][i] == 0:
                     board[j][i] = PLAYER
-                    score = minimax(board, depth-1, True, alpha, beta)
+                    score = minimax(board, depth-1, True, alpha, beta, stats=stats, last=(j, i), ply=ply + 1)
                     board[j][i] = 0
                     best_score = min(score , best_score) #We want the AI to lose as slowly as possible
                     beta = min(beta, best_score) #Minimize score, best explored option for minimizer from the current state
                     if beta <= alpha:
+                        if stats is not None:
+                            stats.cutoff(i)
                         return best_score
                     break
         return best_score
 
+def search(position, depth, isMaximizing, alpha, beta, table=None, budget=None, orderer=None, stats=None):
+    """
+    Inputs: bitboard Position, then the same as minimax
+    Returns: best score from after running minimax on the given position
+    Objective: minimax on a Position, moves are made and unmade in place instead of writing to a numpy board.
+    With a transposition table, a position already searched at least as deep is answered from the table,
+    and otherwise its stored best move is tried first.
+    With a budget, every node is counted against it and SearchTimeout is raised once it is spent.
+    With an orderer, moves are tried best-first and every beta cutoff is recorded in it.
+    With stats, nodes, winner checks, evaluations, table hits and cutoffs are counted in it.
+    """
+    if budget is not None:
+        budget.tick()
+    if stats is not None:
+        stats.node(position.moves)
+        result = stats.winner(position.winner)
+    else:
+        result = position.winner()
+    if depth == 0 or result is not None: #If game done, return score
+        if stats is not None:
+            return stats.evaluate(score_position, position, result)
+        return score_position(position, result)
+    alpha_orig, beta_orig = alpha, beta
+    symbol = AI if isMaximizing else PLAYER
+    entry_move = None
+    if table is not None:
+        key = position.hash(symbol)
+        entry = table.probe(key)
+        if entry is not None:
+            entry_depth, entry_score, flag, entry_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    if stats is not None:
+                        stats.table_hits += 1
+                    return entry_score
+                elif flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.table_hits += 1
+                    return entry_score
+    if orderer is not None:
+        columns = orderer.order(position, symbol, entry_move)
+    elif entry_move is not None:
+        columns = [entry_move] + [col for col in range(BOARD_COLS) if col != entry_move]
+    else:
+        columns = range(BOARD_COLS)
+    best_move = None
+    if isMaximizing:
+        best_score = -float('inf')
+        for index, col in enumerate(columns):
+            if position.can_play(col):
+                position.play(col, AI)
+                score = search(position, depth-1, False, alpha, beta, table, budget, orderer, stats)
+                position.undo(col)
+                if score > best_score:
+                    best_score = score
+                    best_move = col
+                alpha = max(alpha, best_score)
+                if alpha >= beta:
+                    if orderer is not None:
+                        orderer.record_cutoff(position, symbol, col, depth, index)
+                    if stats is not None:
+                        stats.cutoff(index)
+                    break
+    else:
+        best_score = float('inf')
+        for index, col in enumerate(columns):
+            if position.can_play(col):
+                position.play(col, PLAYER)
+                score = search(position, depth-1, True, alpha, beta, table, budget, orderer, stats)
+                position.undo(col)
+                if score < best_score:
+                    best_score = score
+                    best_move = col
+                beta = min(beta, best_score)
+                if beta <= alpha:
+                    if orderer is not None:
+                        orderer.record_cutoff(position, symbol, col, depth, index)
+                    if stats is not None:
+                        stats.cutoff(index)
+                    break
+    if table is not None:
+        #Scores outside the original window are only bounds on the true value
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        table.store(key, depth, best_score, flag, best_move)
+    return best_score
+
 
 
-print('Computer goes first :P ')
-p1 = Computer('p1')
-p2 = Player('p2')
-st = State(p1, p2)
-# board = [[0,0,0,0,0,0,0],
-#          [0,0,0,0,0,0,0],
-#          [0,-1,0,0,0,0,0],
-#          [0,1,0,-1,0,0,0],
-#          [0,1,1,1,0,0,0],
-#          [0,1,1,-1,0,0,0]]
-# print(checkWinner(board))
-st.showBoard()
+if __name__ == '__main__':
+    #Guarded so worker processes of the parallel search can import this file without starting a game
+    print('Computer goes first :P ')
+    p1 = Computer('p1', pondering=True)
+    p2 = Player('p2')
+    st = State(p1, p2)
+    # board = [[0,0,0,0,0,0,0],
+    #          [0,0,0,0,0,0,0],
+    #          [0,-1,0,0,0,0,0],
+    #          [0,1,0,-1,0,0,0],
+    #          [0,1,1,1,0,0,0],
+    #          [0,1,1,-1,0,0,0]]
+    # print(checkWinner(board))
+    st.showBoard()
 
-st.play()
\ No newline at end of file
+    st.play()
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Batch analysis of Connect Four positions.
+Positions are read one per line, lazily, from a file or stdin, searched across a process pool,
+and the results are written as JSON lines in the same order as the input.
+Only a bounded number of chunks of positions are in flight at a time, so the input can be any size.
+
+A position is either the columns played so far, e.g. 44 (the first player moved first, an empty line is the empty board),
+or the board as six rows from the top separated by '/', x for the first player, o for the second and . for empty:
+    ......./......./......./......./...o.../...xx..
+The side to move is the one with fewer discs, x on a tie. Its best move and score are reported:
+    {"position": "44", "move": 3, "score": 104, "exact": false, "depth": 4}
+Near the end of the game the exact solver plays instead, and exact is true: the score is then the exact result,
+on another scale, positive for a win with +k for winning with the k-th last disc, and depth is null.
+and lines that cannot be analyzed get {"position": ..., "error": ...}, so there is one result per input line.
+A move forced by the tactical checks (see tactics.py) is reported at depth 0, as it was played without a search.
+Each process keeps its transposition table from one position to the next, so a score can differ
+slightly between runs with another number of workers, when a deeper result from an earlier position is reused.
+
+    python analyze.py positions.txt --depth 6 --workers 8 --output results.jsonl
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Position, AI, PLAYER, BOARD_ROWS, BOARD_COLS, BOARD_CELLS
+import Minimax
+
+def board_from_moves(moves):
+    """
+    Input: columns played so far, as a string of digits or a list of strings
+    Returns: numpy board of the position with the side to move as AI
+    """
+    position = Position()
+    symbol = AI if len(moves) % 2 == 0 else PLAYER
+    for move in moves:
+        col = int(move)
+        if not 0 <= col < BOARD_COLS or not position.can_play(col):
+            raise ValueError('illegal move ' + str(move))
+        if position.winner() is not None:
+            raise ValueError('the game is over before move ' + str(move))
+        position.play(col, symbol)
+        symbol = -symbol
+    if position.winner() is not None:
+        raise ValueError('the game is over')
+    return position.to_board()
+
+def board_from_rows(text):
+    """
+    Input: board as rows from the top separated by '/', of x, o and .
+    Returns: numpy board of the position with the side to move as AI
+    """
+    rows = text.split('/')
+    if len(rows) != BOARD_ROWS or any(len(row) != BOARD_COLS or set(row) - set('xo.') for row in rows):
+        raise ValueError('expected %d rows of %d cells of x, o or .' % (BOARD_ROWS, BOARD_COLS))
+    first = sum(row.count('x') for row in rows)
+    second = sum(row.count('o') for row in rows)
+    if not 0 <= first - second <= 1:
+        raise ValueError('the first player must have as many discs as the second or one more')
+    #The side to move plays as AI
+    mover, other = ('x', 'o') if first == second else ('o', 'x')
+    cells = {mover: AI, other: PLAYER, '.': 0}
+    board = [[cells[cell] for cell in row] for row in rows]
+    position = Position.from_board(board)
+    if position.moves != first + second:
+        raise ValueError('discs must rest on the bottom or on other discs')
+    if position.winner() is not None:
+        raise ValueError('the game is over')
+    return position.to_board()
+
+def parse_position(text):
+    """
+    Input: one line of input
+    Returns: numpy board of the position with the side to move as AI
+    """
+    if '/' in text:
+        return board_from_rows(text)
+    if not text.isdigit() and text:
+        raise ValueError('expected columns played or rows of x, o and .')
+    if len(text) >= BOARD_CELLS:
+        raise ValueError('the board is full')
+    return board_from_moves(text)
+
+#Computer of an analysis worker process, set by init_analyzer and kept between chunks
+analyzer = None
+
+def init_analyzer(depth, time_limit, table_size):
+    """
+    Inputs: search depth or None, time limit per position in seconds or None, transposition table size
+    Objective: Give the process its own Computer. With a time limit, the depth caps iterative deepening,
+    without one the search goes to the depth, Minimax.DEPTH if that is None too.
+    """
+    global analyzer
+    analyzer = Minimax.Computer('analyzer', depth=Minimax.DEPTH if depth is None else depth, time_limit=time_limit,
+                                table_size=table_size, max_depth=depth if time_limit is not None else None)
+
+def analyze(text):
+    """
+    Input: one line of input
+    Returns: dict of the result, or of the error for a line that cannot be analyzed
+    """
+    try:
+        board = parse_position(text)
+    except ValueError as error:
+        return {'position': text, 'error': str(error)}
+    _, col = analyzer.bestMove(board)
+    exact = analyzer.solved_score is not None
+    return {'position': text, 'move': col, 'score': analyzer.score, 'exact': exact, 'depth': None if exact else analyzer.depth_reached}
+
+def analyze_chunk(lines):
+    """
+    Input: list of input lines
+    Returns: list of their results, in order
+    """
+    return [analyze(text) for text in lines]
+
+def chunks(lines, size):
+    """
+    Inputs: iterable of input lines, positions per chunk
+    Returns: generator of lists of up to size stripped lines, read only as chunks are asked for.
+    Empty lines are kept, they are the empty board.
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line.strip())
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def analyze_stream(lines, depth=None, time_limit=None, workers=None, chunk_size=64, table_size=1 << 18):
+    """
+    Inputs: iterable of input lines, search depth, time limit per position in seconds,
+            number of processes (all cores by default, 1 to analyze in this process), positions per task,
+            transposition table entries per process
+    Returns: generator of result dicts, in input order
+    Objective: Keep every worker busy with a few chunks queued, but never read more than that ahead of the output
+    """
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        init_analyzer(depth, time_limit, table_size)
+        for chunk in chunks(lines, chunk_size):
+            yield from analyze_chunk(chunk)
+        return
+    pending = collections.deque()
+    with ProcessPoolExecutor(workers, initializer=init_analyzer, initargs=(depth, time_limit, table_size)) as pool:
+        for chunk in chunks(lines, chunk_size):
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+            pending.append(pool.submit(analyze_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find the best move of every Connect Four position in a file')
+    parser.add_argument('input', nargs='?', default='-', help='file of positions, one per line, - for stdin')
+    parser.add_argument('--output', help='JSON lines file to write, stdout by default')
+    parser.add_argument('--depth', type=int, help='search depth (default %d), or deepest iteration with --time' % Minimax.DEPTH)
+    parser.add_argument('--time', type=float, help='seconds per position, searched by iterative deepening')
+    parser.add_argument('--workers', type=int, help='processes, all cores by default')
+    parser.add_argument('--chunk', type=int, default=64, help='positions sent to a process at a time')
+    parser.add_argument('--table-size', type=int, default=1 << 18, help='transposition table entries per process')
+    args = parser.parse_args()
+    source = sys.stdin if args.input == '-' else open(args.input)
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+    for result in analyze_stream(source, args.depth, args.time, args.workers, args.chunk, args.table_size):
+        output.write(json.dumps(result) + '\n')
+    output.close()
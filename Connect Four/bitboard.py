@@ -0,0 +1,258 @@
+"""
+Bitboard representation of a Connect Four position.
+Each player's discs live in one integer bitmask. Every column takes BOARD_ROWS + 1 bits,
+the extra bit on top is a sentinel that is always empty, so shifting a mask sideways or
+diagonally never wraps a line from one column into the next.
+
+Bit layout (bit index = column * 7 + height, height 0 is the bottom row):
+     6 13 20 27 34 41 48   <- sentinel row
+     5 12 19 26 33 40 47
+     4 11 18 25 32 39 46
+     3 10 17 24 31 38 45
+     2  9 16 23 30 37 44
+     1  8 15 22 29 36 43
+     0  7 14 21 28 35 42
+"""
+import random
+import numpy as np
+
+BOARD_COLS = 7
+BOARD_ROWS = 6
+AI = 1
+PLAYER = -1
+COLUMN_HEIGHT = BOARD_ROWS + 1 #Bits per column, including the sentinel
+BOARD_CELLS = BOARD_ROWS * BOARD_COLS
+#Shifts to the next cell of a line: vertical, horizontal, and the two diagonals
+DIRECTIONS = (1, COLUMN_HEIGHT, COLUMN_HEIGHT - 1, COLUMN_HEIGHT + 1)
+
+def bottom_mask(col):
+    """
+    Returns the bit of the bottom cell of a column
+    """
+    return 1 << (col * COLUMN_HEIGHT)
+
+def top_mask(col):
+    """
+    Returns the bit of the top playable cell of a column
+    """
+    return 1 << (BOARD_ROWS - 1 + col * COLUMN_HEIGHT)
+
+def column_mask(col):
+    """
+    Returns the bits of every playable cell of a column
+    """
+    return ((1 << BOARD_ROWS) - 1) << (col * COLUMN_HEIGHT)
+
+#Zobrist keys: one random 64-bit number per player per cell, XORed in and out as discs are played.
+#Seeded so keys are the same in every process and a saved table stays valid.
+_zobrist_rng = random.Random(0xC4)
+ZOBRIST = {symbol: [_zobrist_rng.getrandbits(64) for bit in range(BOARD_COLS * COLUMN_HEIGHT)] for symbol in (AI, PLAYER)}
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64) #XORed in when the human is to move
+
+BOTTOM = sum(bottom_mask(col) for col in range(BOARD_COLS))
+FULL_BOARD = BOTTOM * ((1 << BOARD_ROWS) - 1)
+
+def cell_bit(row, col):
+    """
+    Input: row and column in numpy board coordinates (row 0 is the top)
+    Returns: the bit index of that cell
+    """
+    return col * COLUMN_HEIGHT + (BOARD_ROWS - 1 - row)
+
+def popcount(bits):
+    """
+    Returns the number of set bits
+    """
+    return bin(bits).count('1')
+
+def is_win(bits):
+    """
+    Input: bitmask of one player's discs
+    Returns: True if the discs contain four in a row
+    Objective: For each direction, AND the mask with itself shifted by one cell, which leaves
+    the pairs, then AND that with itself shifted by two cells, which leaves the fours.
+    """
+    for shift in DIRECTIONS:
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+def possible_moves(mask):
+    """
+    Input: bitmask of occupied cells
+    Returns: bitmask of the cell each non-full column would be played in
+    """
+    return (mask + BOTTOM) & FULL_BOARD
+
+def winning_cells(bits, mask):
+    """
+    Inputs: bitmask of one player's discs, bitmask of occupied cells
+    Returns: bitmask of the empty cells that would complete four in a row for that player,
+    whether or not they can be played yet
+    """
+    #Vertical, only the cell on top of three discs
+    cells = (bits << 1) & (bits << 2) & (bits << 3)
+    for shift in DIRECTIONS[1:]:
+        #Three discs on one side of the cell
+        pair = (bits << shift) & (bits << (2 * shift))
+        cells |= pair & (bits << (3 * shift))
+        cells |= pair & (bits >> shift)
+        #Or split around it
+        pair = (bits >> shift) & (bits >> (2 * shift))
+        cells |= pair & (bits << shift)
+        cells |= pair & (bits >> (3 * shift))
+    return cells & (FULL_BOARD ^ mask)
+
+def count_streaks(bits, length):
+    """
+    Inputs: bitmask of one player's discs, length of the streak
+    Returns: number of lines of the given length fully owned by the player, over all directions
+    """
+    total = 0
+    for shift in DIRECTIONS:
+        streak = bits
+        for i in range(1, length):
+            streak &= bits >> (i * shift)
+        if streak:
+            total += popcount(streak)
+    return total
+
+class Position:
+    """
+    Represents a board as two bitmasks, one per player, and the height of every column.
+    Moves are made and unmade in place, so a search can walk the tree on one object.
+    """
+    def __init__(self):
+        self.ai = 0 #Discs of the computer
+        self.player = 0 #Discs of the human
+        self.heights = [col * COLUMN_HEIGHT for col in range(BOARD_COLS)] #Next free bit of each column
+        self.moves = 0 #Number of discs on the board
+        self.key = 0 #Zobrist hash of the discs
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Input: numpy board, 1 for the computer and -1 for the human, row 0 is the top
+        Returns: the equivalent Position
+        """
+        position = cls()
+        for col in range(BOARD_COLS):
+            for row in range(BOARD_ROWS - 1, -1, -1):
+                if board[row][col] == 0:
+                    break
+                position.play(col, AI if board[row][col] == AI else PLAYER)
+        return position
+
+    @classmethod
+    def from_bits(cls, ai, player):
+        """
+        Inputs: bitmasks of the computer's and the human's discs
+        Returns: the equivalent Position
+        """
+        position = cls()
+        for col in range(BOARD_COLS):
+            bit = bottom_mask(col)
+            while (ai | player) & bit:
+                position.play(col, AI if ai & bit else PLAYER)
+                bit <<= 1
+        return position
+
+    def to_board(self):
+        """
+        Returns: the position as a numpy board
+        """
+        board = np.zeros((BOARD_ROWS, BOARD_COLS))
+        for col in range(BOARD_COLS):
+            for row in range(BOARD_ROWS):
+                bit = 1 << cell_bit(row, col)
+                if self.ai & bit:
+                    board[row][col] = AI
+                elif self.player & bit:
+                    board[row][col] = PLAYER
+        return board
+
+    def copy(self):
+        """
+        Returns: an independent copy of the position
+        """
+        position = self.__class__.__new__(self.__class__)
+        position.ai = self.ai
+        position.player = self.player
+        position.heights = list(self.heights)
+        position.moves = self.moves
+        position.key = self.key
+        return position
+
+    @property
+    def mask(self):
+        """
+        Bitmask of every occupied cell
+        """
+        return self.ai | self.player
+
+    def hash(self, symbol):
+        """
+        Input: symbol of the player to move
+        Returns: Zobrist hash of the position with the side to move folded in
+        """
+        return self.key if symbol == AI else self.key ^ ZOBRIST_SIDE
+
+    def bits(self, symbol):
+        """
+        Returns: bitmask of the discs owned by symbol
+        """
+        return self.ai if symbol == AI else self.player
+
+    def can_play(self, col):
+        """
+        Returns: True if the column still has room
+        """
+        return self.heights[col] < col * COLUMN_HEIGHT + BOARD_ROWS
+
+    def landing_row(self, col):
+        """
+        Returns: the numpy board row a disc dropped in col would land on
+        """
+        return BOARD_ROWS - 1 - (self.heights[col] - col * COLUMN_HEIGHT)
+
+    def play(self, col, symbol):
+        """
+        Inputs: column, symbol of the player moving
+        Objective: Drop a disc in the column
+        """
+        bit = 1 << self.heights[col]
+        if symbol == AI:
+            self.ai |= bit
+        else:
+            self.player |= bit
+        self.key ^= ZOBRIST[symbol][self.heights[col]]
+        self.heights[col] += 1
+        self.moves += 1
+
+    def undo(self, col):
+        """
+        Input: column of the last disc played in it
+        Objective: Take the top disc back out of the column
+        """
+        self.heights[col] -= 1
+        symbol = AI if self.ai >> self.heights[col] & 1 else PLAYER
+        self.key ^= ZOBRIST[symbol][self.heights[col]]
+        bit = ~(1 << self.heights[col])
+        self.ai &= bit
+        self.player &= bit
+        self.moves -= 1
+
+    def winner(self):
+        """
+        Returns: 1 or -1 if the computer or human has four in a row,
+                0 if the board is full,
+                None if the game is still in progress
+        """
+        if is_win(self.ai):
+            return AI
+        if is_win(self.player):
+            return PLAYER
+        if self.moves == BOARD_CELLS:
+            return 0
+        return None
@@ -0,0 +1,161 @@
+"""
+Opening book for Connect Four.
+The first moves of every game are the same few positions and the most expensive to search well, so they
+are searched once, offline, and stored in a file of (position key, best move) records sorted by key.
+The file is memory-mapped and searched with a binary search, so nothing is loaded up front and every
+process using the book shares the same page cache.
+
+A position and its mirror image have mirrored best moves, so only the one with the smaller key is stored.
+
+File layout, little-endian:
+    header: magic b'C4BK', version (uint16), plies covered (uint16), number of records (uint32), 4 padding bytes
+    records: one uint64 each, key << 3 | best column, sorted
+where the key is the discs of the player to move plus the mask of occupied cells, which is unique per position.
+
+Build a book with:
+    python book.py opening_book.bin --plies 6 --depth 6
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+import numpy as np
+from bitboard import Position, BOARD_COLS, COLUMN_HEIGHT, AI, column_mask
+
+MAGIC = b'C4BK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI4x')
+
+def mirror(bits):
+    """
+    Returns: the bitmask flipped left to right
+    """
+    flipped = 0
+    for col in range(BOARD_COLS):
+        flipped |= ((bits & column_mask(col)) >> (col * COLUMN_HEIGHT)) << ((BOARD_COLS - 1 - col) * COLUMN_HEIGHT)
+    return flipped
+
+def canonical_key(current, mask):
+    """
+    Inputs: discs of the player to move, occupied cells
+    Returns: the key stored in the book, and whether it is the key of the mirrored position
+    """
+    key = current + mask
+    mirrored = mirror(current) + mirror(mask)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+class OpeningBook:
+    """
+    Read-only view of a book file. The file is only opened on the first lookup.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.records = None
+        self.plies = None
+
+    def open(self):
+        """
+        Objective: Map the file and check its header
+        """
+        with open(self.path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.plies, count = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a version %d opening book' % (self.path, VERSION))
+        self.records = np.frombuffer(self.mmap, dtype='<u8', count=count, offset=HEADER.size)
+
+    def close(self):
+        """
+        Objective: Let go of the file. The map is not closed here, arrays taken from records may still point
+        into it, it is unmapped once the last of them is gone. The next lookup maps the file again.
+        """
+        self.records = None
+        self.mmap = None
+
+    def lookup(self, position, symbol):
+        """
+        Inputs: Position, symbol of the player to move
+        Returns: the book's column for the position, or None if it is not in the book
+        """
+        if self.records is None:
+            self.open()
+        if position.moves > self.plies:
+            return None
+        key, mirrored = canonical_key(position.bits(symbol), position.mask)
+        #Records are key << 3 | move, so the record of a key is the first one at or after key << 3
+        index = int(np.searchsorted(self.records, np.uint64(key << 3)))
+        if index == len(self.records) or int(self.records[index]) >> 3 != key:
+            return None
+        col = int(self.records[index]) & 7
+        return BOARD_COLS - 1 - col if mirrored else col
+
+def book_positions(plies):
+    """
+    Input: number of plies
+    Returns: dict of canonical key to (discs of the player to move, occupied cells) for every position
+    reachable in at most that many plies without the game ending
+    """
+    found = {}
+    def walk(position, symbol):
+        key, mirrored = canonical_key(position.bits(symbol), position.mask)
+        if key in found:
+            return
+        if mirrored:
+            found[key] = (mirror(position.bits(symbol)), mirror(position.mask))
+        else:
+            found[key] = (position.bits(symbol), position.mask)
+        if position.moves == plies:
+            return
+        for col in range(BOARD_COLS):
+            if position.can_play(col):
+                position.play(col, symbol)
+                if position.winner() is None:
+                    walk(position, -symbol)
+                position.undo(col)
+    walk(Position(), AI)
+    return found
+
+def build_book(path, plies=6, depth=6, time_limit=None):
+    """
+    Inputs: output path, number of plies covered, search depth or time limit per position
+    Objective: Search every position of the first plies and write the book file.
+    Every position gets a new Computer, so no table or move ordering carries over from the position before
+    and the same settings always build the same book (with a depth, a time limit depends on the machine).
+    """
+    from Minimax import Computer
+    positions = book_positions(plies)
+    records = []
+    start = time.time()
+    for i, (key, (current, mask)) in enumerate(sorted(positions.items())):
+        #The search plays as AI, so give the player to move the AI's discs
+        position = Position.from_bits(current, current ^ mask)
+        computer = Computer('book', depth=depth, time_limit=time_limit)
+        _, col = computer.bestMove(position)
+        records.append(key << 3 | col)
+        if i % 1000 == 0:
+            print('Positions', i, 'of', len(positions), '%.0fs' % (time.time() - start))
+    write_book(path, plies, records)
+
+def write_book(path, plies, records):
+    """
+    Inputs: output path, plies covered, list of key << 3 | move records
+    Objective: Write the header and sorted records, replacing the file only once it is complete
+    """
+    records = np.array(sorted(records), dtype='<u8')
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, plies, len(records)))
+        f.write(records.tobytes())
+    os.replace(temp, path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a Connect Four opening book')
+    parser.add_argument('path')
+    parser.add_argument('--plies', type=int, default=6, help='cover every position up to this many discs')
+    parser.add_argument('--depth', type=int, default=6, help='search depth per position')
+    parser.add_argument('--time', type=float, default=None, help='search time per position in seconds, instead of depth')
+    args = parser.parse_args()
+    build_book(args.path, args.plies, args.depth, args.time)
@@ -0,0 +1,103 @@
+"""
+Evaluation for the Connect Four search.
+The board is scored by its streaks: every line of 4, 3 or 2 cells fully owned by one player is worth
+100000, 100 or 1 to that player. Instead of rescanning the board at every leaf, each line keeps a count
+of each player's discs, and the running score changes only when a line through the cell just played
+(or taken back) becomes or stops being full.
+For the numpy board, the lines are precomputed as flat index arrays so a board is scored with one
+gather per length instead of Python loops.
+"""
+import numpy as np
+from bitboard import Position, AI, PLAYER, BOARD_ROWS, BOARD_COLS, BOARD_CELLS, cell_bit
+
+STREAK_WEIGHTS = {4: 100000, 3: 100, 2: 1}
+
+def lines(length):
+    """
+    Input: length of the line
+    Returns: list of every line of that length on the board, each a list of (row, col) cells
+    """
+    found = []
+    for row in range(BOARD_ROWS):
+        for col in range(BOARD_COLS):
+            for row_step, col_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + (length - 1) * row_step
+                end_col = col + (length - 1) * col_step
+                if 0 <= end_row < BOARD_ROWS and 0 <= end_col < BOARD_COLS:
+                    found.append([(row + i * row_step, col + i * col_step) for i in range(length)])
+    return found
+
+#Flat numpy board indices (row * BOARD_COLS + col) of every line, one array of shape (lines, length) per length
+LINE_INDICES = {length: np.array([[row * BOARD_COLS + col for row, col in line] for line in lines(length)]) for length in STREAK_WEIGHTS}
+
+#Every streak line, and for each cell bit the (line index, length, weight) of the lines through it
+LINES = [(length, line) for length in STREAK_WEIGHTS for line in lines(length)]
+CELL_LINES = {}
+for index, (length, line) in enumerate(LINES):
+    for row, col in line:
+        CELL_LINES.setdefault(cell_bit(row, col), []).append((index, length, STREAK_WEIGHTS[length]))
+
+class EvaluatedPosition(Position):
+    """
+    Position that keeps its streak score up to date as moves are made and unmade.
+    score is the same value evaluate_board computes from scratch, from the computer's point of view.
+    """
+    def __init__(self):
+        Position.__init__(self)
+        self.counts = {AI: [0] * len(LINES), PLAYER: [0] * len(LINES)} #Discs of each player per line
+        self.fours = {AI: 0, PLAYER: 0} #Full lines of 4, any of them is a win
+        self.score = 0
+
+    def copy(self):
+        position = Position.copy(self)
+        position.counts = {symbol: list(counts) for symbol, counts in self.counts.items()}
+        position.fours = dict(self.fours)
+        position.score = self.score
+        return position
+
+    def play(self, col, symbol):
+        """
+        Inputs: column, symbol of the player moving
+        Objective: Drop a disc, then update the lines through its cell
+        """
+        cell = self.heights[col]
+        Position.play(self, col, symbol)
+        counts = self.counts[symbol]
+        gained = 0
+        for index, length, weight in CELL_LINES[cell]:
+            counts[index] += 1
+            if counts[index] == length:
+                gained += weight
+                if length == 4:
+                    self.fours[symbol] += 1
+        self.score += gained if symbol == AI else -gained
+
+    def undo(self, col):
+        """
+        Input: column of the last disc played in it
+        Objective: Take the disc back, then update the lines through its cell
+        """
+        cell = self.heights[col] - 1
+        symbol = AI if self.ai >> cell & 1 else PLAYER
+        counts = self.counts[symbol]
+        lost = 0
+        for index, length, weight in CELL_LINES[cell]:
+            if counts[index] == length:
+                lost += weight
+                if length == 4:
+                    self.fours[symbol] -= 1
+            counts[index] -= 1
+        self.score -= lost if symbol == AI else -lost
+        Position.undo(self, col)
+
+    def winner(self):
+        """
+        Same as Position.winner, answered from the count of full lines of 4
+        """
+        if self.fours[AI]:
+            return AI
+        if self.fours[PLAYER]:
+            return PLAYER
+        if self.moves == BOARD_CELLS:
+            return 0
+        return None
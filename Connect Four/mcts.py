@@ -0,0 +1,183 @@
+"""
+Monte Carlo tree search for Connect Four.
+Instead of an evaluation function, a position is judged by playing many random games from it.
+Every iteration walks down the tree picking children by UCT (upper confidence bound), adds one new node,
+plays a batch of random games from it at once on numpy boards, and adds the results to every node on the path.
+The more time it gets, the stronger it plays.
+
+Nodes are rows of a few numpy arrays (parent, move, children, visits, wins) rather than one object each,
+and the arrays double in size when they fill up.
+"""
+import time
+import numpy as np
+from bitboard import Position, AI, PLAYER, BOARD_ROWS, BOARD_COLS, BOARD_CELLS
+from evaluation import LINE_INDICES
+
+#Lines of 4 with an extra line of padding cells at the end. Playout boards have one extra cell,
+#always empty, so the padding line can never be a win
+PAD_CELL = BOARD_CELLS
+LINES = np.vstack([LINE_INDICES[4], [[PAD_CELL] * 4]])
+#For every cell, the lines of 4 through it, padded to the same count
+_cell_lines = [[index for index, line in enumerate(LINE_INDICES[4]) if cell in line] for cell in range(BOARD_CELLS)]
+_most_lines = max(len(lines) for lines in _cell_lines)
+CELL_LINES = np.array([lines + [len(LINES) - 1] * (_most_lines - len(lines)) for lines in _cell_lines])
+
+def random_playouts(board, symbol, count, rng):
+    """
+    Inputs: numpy board, symbol of the player to move, number of games, numpy random Generator
+    Returns: numpy array with the result of each game, 1 or -1 for the winner, 0 for a draw
+    Objective: Play count random games to the end in lockstep, one move of every unfinished game per step.
+    Only the lines through the disc just played are checked for a win.
+    """
+    boards = np.zeros((count, BOARD_CELLS + 1), dtype=np.int8)
+    boards[:, :BOARD_CELLS] = np.asarray(board).reshape(-1)
+    heights = np.tile(np.count_nonzero(np.asarray(board), axis=0), (count, 1)) #Discs per column
+    results = np.zeros(count, dtype=np.int8)
+    active = np.ones(count, dtype=bool)
+    discs = np.count_nonzero(board)
+    player = symbol
+    while discs < BOARD_CELLS and active.any():
+        games = np.nonzero(active)[0]
+        #A random legal column per game: random noise, with full columns pushed below every legal one
+        noise = rng.random((len(games), BOARD_COLS))
+        noise[heights[games] >= BOARD_ROWS] = -1
+        cols = noise.argmax(axis=1)
+        cells = (BOARD_ROWS - 1 - heights[games, cols]) * BOARD_COLS + cols
+        boards[games, cells] = player
+        heights[games, cols] += 1
+        sums = boards[games[:, None, None], LINES[CELL_LINES[cells]]].sum(axis=2)
+        won = (sums == 4 * player).any(axis=1)
+        results[games[won]] = player
+        active[games[won]] = False
+        discs += 1
+        player = -player
+    return results
+
+class MonteCarloTree:
+    """
+    Search tree rooted at one position.
+    For each node, wins counts the results of its playouts for the player who made the move into it,
+    a draw counting as half a win.
+    """
+    def __init__(self, position, symbol, batch_size=64, exploration=1.4, capacity=4096, seed=None):
+        """
+        Inputs: Position, symbol of the player to move, batch_size random games per iteration,
+                exploration constant of UCT, initial node capacity, seed of the random generator
+        """
+        self.position = position.copy()
+        self.symbol = symbol
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.rng = np.random.default_rng(seed)
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.move = np.full(capacity, -1, dtype=np.int8)
+        self.children = np.full((capacity, BOARD_COLS), -1, dtype=np.int32)
+        self.visits = np.zeros(capacity)
+        self.wins = np.zeros(capacity)
+        self.result = np.full(capacity, 2, dtype=np.int8) #Winner of a finished game, 2 while it is in progress
+        self.size = 1
+        self.iterations = 0
+
+    def grow(self):
+        """
+        Objective: Double the capacity of the node arrays
+        """
+        extra = len(self.parent)
+        self.parent = np.concatenate([self.parent, np.full(extra, -1, dtype=np.int32)])
+        self.move = np.concatenate([self.move, np.full(extra, -1, dtype=np.int8)])
+        self.children = np.concatenate([self.children, np.full((extra, BOARD_COLS), -1, dtype=np.int32)])
+        self.visits = np.concatenate([self.visits, np.zeros(extra)])
+        self.wins = np.concatenate([self.wins, np.zeros(extra)])
+        self.result = np.concatenate([self.result, np.full(extra, 2, dtype=np.int8)])
+
+    def add_node(self, parent, col, result):
+        """
+        Inputs: parent node, column played to reach the new node, result of the new position
+        Returns: index of the new node
+        """
+        if self.size == len(self.parent):
+            self.grow()
+        node = self.size
+        self.size += 1
+        self.parent[node] = parent
+        self.move[node] = col
+        self.children[parent, col] = node
+        self.result[node] = 2 if result is None else result
+        return node
+
+    def select(self, node):
+        """
+        Input: node whose children have all been expanded
+        Returns: the child with the highest upper confidence bound
+        """
+        children = self.children[node]
+        children = children[children >= 0]
+        visits = self.visits[children]
+        scores = self.wins[children] / visits + self.exploration * np.sqrt(np.log(self.visits[node]) / visits)
+        return children[scores.argmax()]
+
+    def iterate(self):
+        """
+        Objective: Run one iteration, selection, expansion, a batch of playouts and backpropagation
+        """
+        position = self.position.copy()
+        symbol = self.symbol
+        node = 0
+        path = [0]
+        while self.result[node] == 2:
+            untried = [col for col in range(BOARD_COLS) if position.can_play(col) and self.children[node, col] < 0]
+            if untried:
+                col = untried[self.rng.integers(len(untried))]
+                position.play(col, symbol)
+                node = self.add_node(node, col, position.winner())
+                path.append(node)
+                symbol = -symbol
+                break
+            node = self.select(node)
+            position.play(int(self.move[node]), symbol)
+            path.append(node)
+            symbol = -symbol
+        if self.result[node] != 2:
+            results = np.full(self.batch_size, self.result[node])
+        else:
+            results = random_playouts(position.to_board(), symbol, self.batch_size, self.rng)
+        ai_wins = np.count_nonzero(results == AI)
+        player_wins = np.count_nonzero(results == PLAYER)
+        draws = len(results) - ai_wins - player_wins
+        #symbol is now the player to move at the leaf, so the player who moved into it is -symbol
+        mover = -symbol
+        for node in reversed(path):
+            self.visits[node] += len(results)
+            self.wins[node] += (ai_wins if mover == AI else player_wins) + draws / 2
+            mover = -mover
+        self.iterations += 1
+
+    def run(self, iterations=None, time_limit=None):
+        """
+        Inputs: number of iterations and/or time limit in seconds, whichever ends first
+        """
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        while iterations is None or self.iterations < iterations:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            self.iterate()
+
+    def root_visits(self):
+        """
+        Returns: array of playouts through each root column, 0 for columns never tried
+        """
+        visits = np.zeros(BOARD_COLS)
+        for col, child in enumerate(self.children[0]):
+            if child >= 0:
+                visits[col] = self.visits[child]
+        return visits
+
+def search_tree(board, symbol, iterations, time_limit, batch_size, exploration, seed):
+    """
+    Inputs: numpy board, symbol to move, then the settings of MonteCarloTree and run
+    Returns: playouts through each root column
+    Objective: Grow one tree, used by worker processes so several independent trees can be summed
+    """
+    tree = MonteCarloTree(Position.from_board(board), symbol, batch_size, exploration, seed=seed)
+    tree.run(iterations, time_limit)
+    return tree.root_visits()
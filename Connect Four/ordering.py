@@ -0,0 +1,83 @@
+"""
+Move ordering for the Connect Four search.
+Alpha-beta prunes the most when the best move is searched first, so moves are tried in this order:
+the transposition table's best move, the killer moves of this ply, then by history score,
+with ties broken center-out since center columns take part in the most lines.
+"""
+from bitboard import AI, PLAYER, BOARD_COLS, BOARD_CELLS, COLUMN_HEIGHT
+
+CENTER_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+class MoveOrderer:
+    """
+    Keeps the killer moves and history table between nodes, and counts beta cutoffs
+    so the effect of the ordering can be measured.
+    """
+    def __init__(self):
+        self.killers = [[None, None] for ply in range(BOARD_CELLS + 1)] #Two columns per ply that caused a cutoff
+        self.history = {symbol: [0] * (BOARD_COLS * COLUMN_HEIGHT) for symbol in (AI, PLAYER)} #Cutoff weight per cell
+        self.nodes = 0 #Nodes whose moves were ordered
+        self.cutoffs = 0 #Beta cutoffs
+        self.first_move_cutoffs = 0 #Beta cutoffs caused by the first move tried
+
+    def order(self, position, symbol, tt_move=None):
+        """
+        Inputs: Position, symbol of the player to move, best move stored in the transposition table
+        Returns: list of playable columns, most promising first
+        """
+        self.nodes += 1
+        killers = self.killers[position.moves]
+        history = self.history[symbol]
+        heights = position.heights
+        columns = [col for col in CENTER_ORDER if position.can_play(col)]
+        priority = {}
+        for col in columns:
+            if col == tt_move:
+                priority[col] = 1 << 62
+            elif col == killers[0]:
+                priority[col] = 1 << 61
+            elif col == killers[1]:
+                priority[col] = 1 << 60
+            else:
+                priority[col] = history[heights[col]]
+        #Stable sort, so equal priorities stay center-out
+        columns.sort(key=priority.__getitem__, reverse=True)
+        return columns
+
+    def record_cutoff(self, position, symbol, col, depth, index):
+        """
+        Inputs: Position the cutoff happened in (with the move already undone), symbol of the player to move,
+                column that caused the cutoff, remaining depth, and how many moves were tried before it
+        Objective: Remember the move as a killer for this ply and reward its cell in the history table
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        killers = self.killers[position.moves]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        #Deeper cutoffs save more work, so they weigh more
+        self.history[symbol][position.heights[col]] += depth * depth
+
+    def new_search(self):
+        """
+        Objective: Forget the killers and age the history before searching a new position,
+        so moves that were good several moves ago stop dominating
+        """
+        for killers in self.killers:
+            killers[0] = killers[1] = None
+        for history in self.history.values():
+            for cell in range(len(history)):
+                history[cell] >>= 1
+
+    def statistics(self):
+        """
+        Returns: dict of node and cutoff counts, including how often the first move tried caused the cutoff
+        """
+        return {
+            'nodes': self.nodes,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoffs': self.first_move_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+        }
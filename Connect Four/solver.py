@@ -0,0 +1,151 @@
+"""
+Exact Connect Four solver.
+Connect Four is solved, so near the end of the game the engine can stop guessing with the streak
+evaluation and compute the true result. This is a negamax search over bitboards that only looks at
+moves that do not hand the opponent an immediate win, orders them by how many new threats they make,
+remembers upper bounds in a transposition table, and narrows in on the exact score with null-window
+searches instead of one wide search.
+
+Scores are from the point of view of the player to move: 0 is a draw, a positive score is a win and a
+negative score a loss, and the sooner the game ends the larger the magnitude
+(a win with the player's own k-th last disc scores k).
+"""
+from bitboard import (BOARD_CELLS, column_mask, possible_moves, winning_cells, popcount)
+from transposition import TranspositionTable, UPPER
+from ordering import CENTER_ORDER
+
+def half(score):
+    """
+    Halves a score, rounding toward zero
+    """
+    return int(score / 2)
+
+class Solver:
+    """
+    Solves positions exactly. The transposition table is kept between calls, so solving the
+    positions of one game one after another gets cheaper as the game goes on.
+    """
+    def __init__(self, table_size=1 << 20):
+        """
+        Input: table_size, number of transposition table entries
+        """
+        self.table = TranspositionTable(table_size)
+        self.nodes = 0 #Nodes searched over every call
+        self.budget = None #Budget of the current best_move, see Minimax.SearchBudget
+
+    def solve(self, position, symbol):
+        """
+        Inputs: Position, symbol of the player to move
+        Returns: exact score of the position for that player
+        """
+        self.budget = None
+        return self.solve_bits(position.bits(symbol), position.mask, position.moves)
+
+    def best_move(self, position, symbol, budget=None):
+        """
+        Inputs: Position, symbol of the player to move,
+                budget, optional object whose tick is called at every node and raises to stop the search
+        Returns: column of an optimal move and its exact score, ties going to the column closest to the center
+        Objective: Solve every move. A search stopped by the budget stores nothing it had not finished,
+        so the table stays valid for the next call.
+        """
+        self.budget = budget
+        current, mask, moves = position.bits(symbol), position.mask, position.moves
+        win_now = winning_cells(current, mask) & possible_moves(mask)
+        best_col = None
+        best_score = -float('inf')
+        for col in CENTER_ORDER:
+            move = possible_moves(mask) & column_mask(col)
+            if not move:
+                continue
+            if move & win_now:
+                return col, half(BOARD_CELLS + 1 - moves)
+            #The opponent moves next, with our discs as theirs to ignore
+            score = -self.solve_bits(current ^ mask, mask | move, moves + 1)
+            if score > best_score:
+                best_score = score
+                best_col = col
+        return best_col, best_score
+
+    def solve_bits(self, current, mask, moves):
+        """
+        Inputs: discs of the player to move, occupied cells, number of discs played
+        Returns: exact score of the position
+        Objective: Binary search for the score with null-window negamax calls,
+        each one only answers whether the score is above a guess
+        """
+        if winning_cells(current, mask) & possible_moves(mask):
+            return half(BOARD_CELLS + 1 - moves)
+        low = -half(BOARD_CELLS - moves)
+        high = half(BOARD_CELLS + 1 - moves)
+        while low < high:
+            guess = low + half(high - low)
+            #Try guesses near zero first, draws and close games are the cheapest to prove
+            if guess <= 0 and half(low) < guess:
+                guess = half(low)
+            elif guess >= 0 and half(high) > guess:
+                guess = half(high)
+            score = self.negamax(current, mask, moves, guess, guess + 1)
+            if score <= guess:
+                high = score
+            else:
+                low = score
+        return low
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        """
+        Inputs: discs of the player to move, occupied cells, number of discs played, search window
+        Returns: the exact score if it is inside the window, otherwise a bound on the side it fell
+        Objective: Search assuming the player to move cannot win immediately, which the caller guarantees
+        by only playing moves that leave no immediate win to the opponent
+        """
+        self.nodes += 1
+        if self.budget is not None:
+            self.budget.tick()
+        opponent = current ^ mask
+        possible = possible_moves(mask)
+        opponent_wins = winning_cells(opponent, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):
+                #Two cells to block, one of them will be played
+                return -half(BOARD_CELLS - moves)
+            possible = forced
+        #Never play under a cell where the opponent would win
+        safe = possible & ~(opponent_wins >> 1)
+        if not safe:
+            return -half(BOARD_CELLS - moves)
+        if moves >= BOARD_CELLS - 2:
+            return 0
+        #The opponent cannot win on their next move, so the score is at least this
+        lower = -half(BOARD_CELLS - 2 - moves)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+        #We cannot win on this move, so the score is at most this
+        upper = half(BOARD_CELLS - 1 - moves)
+        key = current + mask #Unique per position and side to move
+        entry = self.table.probe(key)
+        if entry is not None:
+            upper = entry[1]
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+        #Moves that create the most new threats first, center-out among equals
+        candidates = []
+        for col in CENTER_ORDER:
+            move = safe & column_mask(col)
+            if move:
+                candidates.append((popcount(winning_cells(current | move, mask)), move))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        for _, move in candidates:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        #Every move failed low, alpha is an upper bound on the score
+        self.table.store(key, BOARD_CELLS - moves, alpha, UPPER, None)
+        return alpha
@@ -0,0 +1,111 @@
+"""
+Statistics of one Connect Four search, for tuning the depth, move ordering and evaluation.
+The search only collects them when it is given a SearchStats, otherwise every hook is skipped
+with a single None check, so they cost nothing when switched off.
+"""
+import time
+
+class SearchStats:
+    """
+    Counts what a search does: nodes per ply, leaves, transposition table hits, where the beta cutoffs happened,
+    and the calls to and time spent in the winner check and the evaluation.
+    """
+    def __init__(self, root_moves):
+        """
+        Input: number of discs on the board at the root, so nodes can be counted by ply from the root
+        """
+        self.root_moves = root_moves
+        self.start = time.perf_counter()
+        self.nodes = [] #Nodes per ply, the moves of the root are ply 1
+        self.iterations = [] #[depth, nodes] of each root search, one per iterative deepening iteration
+        self.depth = None #Depth of the search whose move was played, set by the caller
+        self.table_hits = 0 #Nodes answered from the transposition table
+        self.cutoffs = [] #Beta cutoffs by the index of the move that caused them, 0 is the first move tried
+        self.winner_checks = 0
+        self.winner_seconds = 0.0
+        self.evaluations = 0 #Leaves, nodes at depth 0 or at the end of the game
+        self.evaluation_seconds = 0.0
+        self.pv = [] #Principal variation, set by the caller once the search is done
+        self.solved = False #True if the exact solver, the opening book, a tactical check or a pondered answer played instead of a search
+
+    def start_iteration(self, depth):
+        """
+        Input: depth of the root search starting
+        """
+        self.iterations.append([depth, 0])
+
+    def node(self, moves):
+        """
+        Input: number of discs on the board at the node
+        """
+        ply = moves - self.root_moves
+        while len(self.nodes) <= ply:
+            self.nodes.append(0)
+        self.nodes[ply] += 1
+        if self.iterations:
+            self.iterations[-1][1] += 1
+
+    def cutoff(self, index):
+        """
+        Input: how many moves were tried before the one that caused the cutoff
+        """
+        while len(self.cutoffs) <= index:
+            self.cutoffs.append(0)
+        self.cutoffs[index] += 1
+
+    def winner(self, check, *args):
+        """
+        Inputs: winner check function and its arguments
+        Returns: what the check returns, after counting and timing the call
+        """
+        start = time.perf_counter()
+        result = check(*args)
+        self.winner_seconds += time.perf_counter() - start
+        self.winner_checks += 1
+        return result
+
+    def evaluate(self, evaluate, *args):
+        """
+        Inputs: evaluation function and its arguments
+        Returns: the score, after counting and timing the call
+        """
+        start = time.perf_counter()
+        score = evaluate(*args)
+        self.evaluation_seconds += time.perf_counter() - start
+        self.evaluations += 1
+        return score
+
+    def report(self):
+        """
+        Returns: dict of every statistic. The effective branching factor is the branching factor a uniform tree
+        with as many nodes as the root search at that depth would have. The tree is depth + 1 plies deep,
+        the moves of the root come on top of the depth searched below them.
+        """
+        seconds = time.perf_counter() - self.start
+        nodes = sum(self.nodes)
+        cutoffs = sum(self.cutoffs)
+        branching = None
+        for depth, iteration_nodes in self.iterations:
+            if depth == self.depth:
+                branching = iteration_nodes ** (1 / (depth + 1))
+        return {
+            'depth': self.depth,
+            'solved': self.solved,
+            'seconds': seconds,
+            'nodes': nodes,
+            'nodes_per_second': nodes / seconds if seconds else 0.0,
+            'nodes_by_ply': list(self.nodes),
+            'nodes_by_iteration': {depth: count for depth, count in self.iterations},
+            'effective_branching_factor': branching,
+            'leaf_evaluations': self.evaluations,
+            'table_hits': self.table_hits,
+            'cutoffs': cutoffs,
+            'first_move_cutoffs': self.cutoffs[0] if self.cutoffs else 0,
+            'later_move_cutoffs': cutoffs - (self.cutoffs[0] if self.cutoffs else 0),
+            'cutoffs_by_move_index': list(self.cutoffs),
+            'checkWinner_calls': self.winner_checks,
+            'checkWinner_seconds': self.winner_seconds,
+            'evaluate_board_calls': self.evaluations,
+            'evaluate_board_seconds': self.evaluation_seconds,
+            'principal_variation': list(self.pv),
+        }
@@ -0,0 +1,53 @@
+"""
+Tactical checks run before the Connect Four search, one move deep for each side on the bitboards.
+They find a move that wins at once, the move that has to block a win of the opponent,
+moves that let the opponent win by playing on top of them, and moves that make two threats at once.
+That settles forced positions without any search, and keeps the search from spending time on
+moves that lose at once, which the evaluation, scoring lines window by window, can miss at low depths.
+"""
+from bitboard import possible_moves, winning_cells, column_mask, popcount
+from ordering import CENTER_ORDER
+
+def first_column(moves):
+    """
+    Input: bitmask of cells, at most one per column
+    Returns: the column of the cell closest to the center
+    """
+    for col in CENTER_ORDER:
+        if moves & column_mask(col):
+            return col
+
+def tactical_moves(position, symbol):
+    """
+    Inputs: Position, symbol of the player to move
+    Returns: the column to play and None when the move is forced, otherwise None and the columns worth searching,
+             center-out. Forced moves: a win, the only block of an opponent win, a move that makes two threats
+             the opponent cannot both block, or the only move that does not lose at once. When the opponent
+             has two wins to block, or every move loses at once, the game is lost and the first block or move is played.
+    """
+    current = position.bits(symbol)
+    mask = position.mask
+    possible = possible_moves(mask)
+    wins = winning_cells(current, mask) & possible
+    if wins:
+        return first_column(wins), None
+    threats = winning_cells(position.bits(-symbol), mask)
+    blocks = possible & threats
+    if blocks:
+        return first_column(blocks), None
+    #Playing under an opponent win lets them play there next
+    safe = possible & ~(threats >> 1)
+    if not safe:
+        return first_column(possible), None
+    columns = []
+    for col in CENTER_ORDER:
+        move = safe & column_mask(col)
+        if move:
+            #Two wins the opponent has to block next move, they can only block one
+            after = mask | move
+            if popcount(winning_cells(current | move, after) & possible_moves(after)) >= 2:
+                return col, None
+            columns.append(col)
+    if len(columns) == 1:
+        return columns[0], None
+    return None, columns
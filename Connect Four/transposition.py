@@ -0,0 +1,121 @@
+"""
+Transposition table for the Connect Four search.
+The same position is reached through many different move orders, so the result of searching it
+is stored under its Zobrist hash and reused. The table has a fixed number of slots, so its memory
+never grows past what it was created with.
+Zobrist keys are the same in every process, so a table stays valid across moves and games,
+and can be saved to disk and loaded back.
+"""
+import os
+import numpy as np
+
+#Bound types of a stored score
+EXACT = 0 #The score is the true minimax value
+LOWER = 1 #The search failed high, the true value is at least the score
+UPPER = 2 #The search failed low, the true value is at most the score
+
+FILE_VERSION = 1
+
+class TranspositionTable:
+    """
+    Fixed size table indexed by hash modulo the number of slots.
+    Each slot holds one entry: key, depth, score, bound type and best move, kept in parallel lists.
+    When two positions land on the same slot, the one searched deeper is kept (depth-preferred),
+    unless the stored one is stale: not stored or probed during the last max_age searches.
+    Entries that keep being used never go stale, so popular lines stay in the table.
+    """
+    def __init__(self, max_entries=1 << 18, max_age=8):
+        """
+        Input: max_entries, the number of slots, which caps the memory used,
+               max_age, searches (see new_search) an entry can go unused before any new entry may replace it
+        """
+        self.size = max_entries
+        self.max_age = max_age
+        self.generation = 0 #Number of the current search
+        self.clear()
+
+    def clear(self):
+        """
+        Objective: Empty every slot
+        """
+        self.keys = [None] * self.size
+        self.depths = [-1] * self.size
+        self.scores = [0] * self.size
+        self.flags = [EXACT] * self.size
+        self.moves = [None] * self.size
+        self.ages = [0] * self.size #Generation each entry was last stored or probed in
+        self.filled = 0
+
+    def __len__(self):
+        return self.filled
+
+    def new_search(self):
+        """
+        Objective: Start a new generation, entries not used from now on age by one
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Input: Zobrist hash of the position
+        Returns: (depth, score, flag, best move) if the position is stored, else None
+        """
+        index = key % self.size
+        if self.keys[index] != key:
+            return None
+        self.ages[index] = self.generation
+        return self.depths[index], self.scores[index], self.flags[index], self.moves[index]
+
+    def store(self, key, depth, score, flag, move):
+        """
+        Inputs: Zobrist hash, depth searched, score, bound type and best move found
+        Objective: Save the entry unless the slot holds a deeper search that is not stale
+        """
+        index = key % self.size
+        if depth < self.depths[index] and self.generation - self.ages[index] <= self.max_age:
+            return
+        if self.keys[index] is None:
+            self.filled += 1
+        self.keys[index] = key
+        self.depths[index] = depth
+        self.scores[index] = score
+        self.flags[index] = flag
+        self.moves[index] = move
+        self.ages[index] = self.generation
+
+    def save(self, path):
+        """
+        Input: file to write
+        Objective: Save every entry with how many searches ago it was last used, so aging carries on after loading.
+        The file is written next to path and then renamed over it, so a crash never leaves half a file.
+        """
+        used = [index for index in range(self.size) if self.keys[index] is not None]
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as fw:
+            np.savez(fw, version=np.array([FILE_VERSION]),
+                     keys=np.array([self.keys[index] for index in used], dtype=np.uint64),
+                     depths=np.array([self.depths[index] for index in used], dtype=np.int16),
+                     scores=np.array([self.scores[index] for index in used], dtype=np.int64),
+                     flags=np.array([self.flags[index] for index in used], dtype=np.int8),
+                     moves=np.array([-1 if self.moves[index] is None else self.moves[index] for index in used], dtype=np.int8),
+                     ages=np.array([self.generation - self.ages[index] for index in used], dtype=np.int64))
+        os.replace(temporary, path)
+
+    def load(self, path):
+        """
+        Input: file written by save
+        Objective: Add its entries, through store so a table of another size keeps the deeper or fresher entry
+        when two land on the same slot. Entries older than max_age are stale and not loaded.
+        """
+        saved = np.load(path)
+        if int(saved['version'][0]) != FILE_VERSION:
+            raise ValueError(path + ' is not a version ' + str(FILE_VERSION) + ' transposition table file')
+        entries = zip(saved['keys'].tolist(), saved['depths'].tolist(), saved['scores'].tolist(),
+                      saved['flags'].tolist(), saved['moves'].tolist(), saved['ages'].tolist())
+        generation = self.generation
+        for key, depth, score, flag, move, age in entries:
+            if age > self.max_age:
+                continue
+            self.generation = generation - age
+            self.store(key, depth, score, flag, None if move < 0 else move)
+        self.generation = generation
@@ -124,9 +124,10 @@ def print_board(game_state):
     print('-------------')
     print('| ' + str(game_state[2][0]) + ' | ' + str(game_state[2][1]) + ' | ' + str(game_state[2][2]) + ' |')
     print('-------------')
-print('Please follow this cell notation for movemaking: ')
-print_board(state)
-p1 = Player('p1')
-p2 = Player('p2')
-st = State(p1, p2)
-st.play()
\ No newline at end of file
+if __name__ == '__main__':
+    print('Please follow this cell notation for movemaking: ')
+    print_board(state)
+    p1 = Player('p1')
+    p2 = Player('p2')
+    st = State(p1, p2)
+    st.play()
\ No newline at end of file
@@ -0,0 +1,500 @@
+"""
+Reinforced learning agent for Tic Tac Toe and the self-play that trains it.
+Run AI Reinforced Learning.py to train it or play against it.
+"""
+import numpy as np 
+import pickle 
+import struct
+import os
+from concurrent.futures import ProcessPoolExecutor
+BOARD_COLS, BOARD_ROWS =  3,3
+BOARD_CELLS = BOARD_COLS * BOARD_ROWS
+NUM_STATES = 3 ** BOARD_CELLS #Every board, including unreachable ones
+POW3 = 3 ** np.arange(BOARD_CELLS)
+DIGIT = {0: 0, 1: 1, -1: 2} #Base 3 digit of each cell value
+#Cells of each row, column and diagonal
+WIN_LINES = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8], [0, 3, 6], [1, 4, 7], [2, 5, 8], [0, 4, 8], [2, 4, 6]])
+#The 8 rotations and reflections of the board, as the cell each cell is taken from
+_grid = np.arange(BOARD_CELLS).reshape(BOARD_ROWS, BOARD_COLS)
+SYMMETRIES = np.array([np.rot90(grid, turns).reshape(BOARD_CELLS) for grid in (_grid, _grid.T) for turns in range(4)])
+#Canonical id of every state: the smallest id among its 8 symmetric boards, as an array and as a list for fast lookups
+_digits = (np.arange(NUM_STATES)[:, None] // POW3) % 3
+CANONICAL_IDS = np.min([_digits[:, symmetry] @ POW3 for symmetry in SYMMETRIES], axis=0)
+CANONICAL = CANONICAL_IDS.tolist()
+#Policy file: a 16 byte header (magic, format version, number of states) then one float32 value per state id
+POLICY_MAGIC = b'TTTV'
+POLICY_VERSION = 1
+POLICY_HEADER = struct.Struct('<4sII4x')
+
+def board_id(board):
+    """
+    Input: board
+    Returns: the state id of the board, the base 3 number whose digit i is the value of cell i
+    """
+    cells = np.asarray(board).reshape(BOARD_CELLS)
+    return int(np.dot(np.where(cells == -1, 2, cells).astype(np.int64), POW3))
+
+def legacy_values(states_value):
+    """
+    Input: states_value dict from a pickled policy, keyed by old string keys or by state id
+    Returns: array of values indexed by canonical state id, averaging the values of symmetric boards
+    """
+    totals = np.zeros(NUM_STATES)
+    counts = np.zeros(NUM_STATES)
+    for state, value in states_value.items():
+        if isinstance(state, str):
+            state = hash_to_id(state)
+        totals[CANONICAL[state]] += value
+        counts[CANONICAL[state]] += 1
+    return np.divide(totals, counts, out=np.zeros(NUM_STATES), where=counts > 0)
+
+def hash_to_id(boardHash):
+    """
+    Input: key of the old string format, e.g. '[ 1.  0. -1.  0.  0.  0.  0.  0.  0.]'
+    Returns: the state id of that board
+    """
+    cells = boardHash.strip('[]').split()
+    return sum(DIGIT[int(float(cell))] * 3 ** i for i, cell in enumerate(cells))
+
+class State:
+    """
+    Represents the state of the board we are in
+    """
+    def __init__(self, p1, p2):
+        """
+        Inputs: p1, p2 both objects of either HumanPlayer or Agent
+        Initializes a game state given 2 agents
+        Sets an empty board, both players, game in progress, no game state, and gives first symbol as 1, like an X.
+        """
+        #3x3 array of zeroes
+        self.board = np.zeros((BOARD_ROWS, BOARD_COLS))
+        self.p1 = p1
+        self.p2 = p2 
+        self.isEnd = False
+        self.boardHash = 0 #Represents unique game state pattern, as a state id kept up to date by update_state
+        #Player 1 is 1 and Player 2 is -1
+        self.playerSymbol = 1
+    def getHash(self):
+        """
+        Returns the unique game state as a hashable format 
+        """
+        return self.boardHash
+    def available_positions(self):
+        """
+        Returns a list of possible positions at the current board state
+        """
+        positions = []
+        for i in range(BOARD_ROWS):
+            for j in range(BOARD_COLS):
+                if self.board[i][j] == 0:
+                    positions.append((i,j))
+        return positions
+    def update_state(self, position):
+        """
+        Input: position, tuple of coordinates pointing to a cell on the board
+        Objective: Given position, we set that cell on the board to the current player symbol, and toggle symbol.
+        """
+        self.board[position] = self.playerSymbol
+        self.boardHash += DIGIT[self.playerSymbol] * 3 ** (position[0] * BOARD_COLS + position[1])
+        self.playerSymbol *= -1
+    def check_winner(self):
+        """
+        Objective: Checks the game state's status, if win/draw/ or in progress.
+        Returns -1, 0, 1, None based on which player wins, if draw, or in progress, respectively
+        """
+        #Vertical
+        vert = 0
+        hori = 0
+        for i in range(BOARD_ROWS):
+            for j in range(BOARD_COLS):
+                vert += self.board[j][i]
+                hori += self.board[i][j]
+            if vert == 3 or hori == 3:
+                self.isEnd = True
+                return 1
+            if vert == -3 or hori == -3:
+                self.isEnd = True
+                return -1
+            vert = hori = 0
+        #Two diagonals to check
+        diag_sum1 = sum([self.board[i, i] for i in range(BOARD_COLS)])
+        diag_sum2 = sum([self.board[i, BOARD_COLS - i - 1] for i in range(BOARD_COLS)])
+        check_diag = max(abs(diag_sum1), abs(diag_sum2))
+        if check_diag == 3:
+            if diag_sum1 == 3 or diag_sum2 == 3:
+                self.isEnd = True
+                return 1        
+            else:
+                self.isEnd = True
+                return -1
+        #No more positions, draw
+        if len(self.available_positions()) == 0:
+            self.isEnd = True
+            return 0
+        #Game still in progress, return no reward
+        self.isEnd = False
+        return None
+    def give_reward(self):
+        """
+        Check winner and depending on which wins, give a reward to that player.
+        If draw, you can decide aggressiveness on computer based on the amount you give them.
+        """
+        result = self.check_winner()
+        if result == 1:
+            self.p1.feed_reward(1)
+            self.p2.feed_reward(0)
+        elif result == -1:
+            self.p1.feed_reward(0)
+            self.p2.feed_reward(1)
+        else:
+            self.p1.feed_reward(0.1)
+            self.p2.feed_reward(0.5)
+    def reset(self):
+        """
+        Objective: Reset the game.
+        """
+        self.board = np.zeros((BOARD_ROWS, BOARD_COLS))
+        self.boardHash = 0
+        self.isEnd = False
+        self.playerSymbol = 1   
+    def play(self, rounds=100):
+        """
+        Input: rounds represents the number of games the two computers will play 
+        Objective: Simulate matches between the two computers 
+        """
+        for i in range(rounds):
+            if i % 1000 == 0: 
+                print('Rounds', i)
+            while not self.isEnd:
+                positions = self.available_positions()
+                p1_action = self.p1.choose_action(positions, self.board, self.playerSymbol) #P1 decides action
+                self.update_state(p1_action) #Update board on where p1 decided to move
+                board_hash = self.getHash() #Format the current state right now
+                self.p1.addState(board_hash) #Add the current board to p1
+
+                win = self.check_winner()
+                if win is not None: 
+                    #If outcome, give appropriate rewards and reset everything
+                    self.give_reward()
+                    self.p1.reset()
+                    self.p2.reset()
+                    self.reset()
+                    break
+                else:
+                    #Same thing, but player 2 turn
+                    positions = self.available_positions()
+                    p2_action = self.p2.choose_action(positions, self.board, self.playerSymbol)
+                    self.update_state(p2_action)
+                    board_hash = self.getHash()
+                    self.p2.addState(board_hash)
+
+                    win = self.check_winner()
+                    if win is not None:
+                        self.give_reward()
+                        self.p1.reset()
+                        self.p2.reset()
+                        self.reset()
+                        break
+        self.p1.savePolicy() #Remember the data
+    def play_batched(self, rounds=100, batch_size=4096):
+        """
+        Inputs: rounds represents the number of games the two computers will play,
+                batch_size is how many of them are played at once
+        Objective: Same training as play, but batch_size games advance together as one (batch_size, 9) array.
+        Move choice, win checks and rewards are numpy operations over the whole batch,
+        and both agents learn from every game of a batch before the next batch starts.
+        """
+        agents = [self.p1, self.p2]
+        values = [np.array(agent.states_value, dtype=float) for agent in agents]
+        for start in range(0, rounds, batch_size):
+            print('Rounds', start)
+            count = min(batch_size, rounds - start)
+            histories, lengths, winner = play_batch(agents, values, count)
+            #Same rewards as give_reward: 1 to the winner, 0 to the loser, 0.1 and 0.5 on a draw
+            rewards = [np.where(winner == 1, 1, np.where(winner == -1, 0, 0.1)),
+                       np.where(winner == -1, 1, np.where(winner == 1, 0, 0.5))]
+            for i, agent in enumerate(agents):
+                feed_rewards(values[i], histories[i], lengths[i], rewards[i], agent.lr, agent.decay_gamma)
+        for i, agent in enumerate(agents):
+            agent.states_value = values[i]
+        self.p1.savePolicy() #Remember the data
+    def play_parallel(self, rounds=100, workers=None, sync_rounds=50000, batch_size=4096, seed=None):
+        """
+        Inputs: rounds represents the number of games the two computers will play,
+                workers is the number of processes (all cores by default),
+                sync_rounds is how many games are played between merges, batch_size as in play_batched,
+                seed of the random streams, None for a different run every time
+        Objective: Same training as play_batched, split over worker processes.
+        Each worker starts from the master values, plays its share of sync_rounds with its own random stream,
+        and sends back its values and how often it updated each state. The master value of every state becomes
+        the visit weighted average of the workers' values, the workers pull it for the next sync_rounds, and so on.
+        """
+        workers = workers or os.cpu_count()
+        agents = [self.p1, self.p2]
+        settings = [(agent.epsilon, agent.lr, agent.decay_gamma) for agent in agents]
+        values = [np.array(agent.states_value, dtype=float) for agent in agents]
+        streams = np.random.SeedSequence(seed)
+        pool = ProcessPoolExecutor(workers)
+        try:
+            for start in range(0, rounds, sync_rounds):
+                print('Rounds', start)
+                count = min(sync_rounds, rounds - start)
+                shares = [count // workers + (k < count % workers) for k in range(workers)]
+                jobs = [pool.submit(train_worker, values, settings, share, batch_size, stream)
+                        for share, stream in zip(shares, streams.spawn(workers)) if share]
+                results = [job.result() for job in jobs]
+                for i in range(len(agents)):
+                    visits = sum(result[i][1] for result in results)
+                    totals = sum(result[i][0] * result[i][1] for result in results)
+                    seen = visits > 0
+                    values[i][seen] = totals[seen] / visits[seen]
+        finally:
+            pool.shutdown()
+        for i, agent in enumerate(agents):
+            agent.states_value = values[i]
+        self.p1.savePolicy() #Remember the data
+    def human_play(self):
+        """
+        Objective: Play against the trained bot
+        """
+        while not self.isEnd:
+            # Player 1
+            positions = self.available_positions()
+            p1_action = self.p1.choose_action(positions, self.board, self.playerSymbol)
+            # take action and upate board state
+            self.update_state(p1_action)
+            self.showBoard()
+            # check board status if it is end
+            win = self.check_winner()
+            if win is not None:
+                if win == 1:
+                    print(self.p1.name, "wins!")
+                else:
+                    print("tie!")
+                self.reset()
+                break
+
+            else:
+                # Player 2
+                positions = self.available_positions()
+                p2_action = self.p2.choose_action(positions)
+
+                self.update_state(p2_action)
+                self.showBoard()
+                win = self.check_winner()
+                if win is not None:
+                    if win == -1:
+                        print(self.p2.name, "wins!")
+                    else:
+                        print("tie!")
+                    self.reset()
+                    break
+    def showBoard(self):
+        """
+        Objective: Show the board for user, X are 1, O are -1
+        """
+        for i in range(0, BOARD_ROWS):
+            print('-------------')
+            row = '| '
+            for j in range(0, BOARD_COLS):
+                if self.board[i, j] == 1:
+                    token = 'X'
+                if self.board[i, j] == -1:
+                    token = 'O'
+                if self.board[i, j] == 0:
+                    token = ' '
+                row += token + ' | '
+            print(row)
+        print('-------------')
+
+def play_batch(agents, values, count, rng=np.random):
+    """
+    Inputs: the two agents (or anything with an epsilon), their values as arrays indexed by state id, number of games,
+            random generator, the global numpy one by default
+    Returns: for each agent the (count, 5) array of canonical state ids it moved to in each game and the count of them,
+             and the winner of each game, 0 for a draw
+    Objective: Play count games in lockstep. Each agent picks moves the way choose_action does,
+    exploring with probability epsilon and otherwise taking the last move of highest value.
+    """
+    boards = np.zeros((count, BOARD_CELLS), dtype=np.int8)
+    ids = np.zeros(count, dtype=np.int64)
+    active = np.ones(count, dtype=bool)
+    winner = np.zeros(count, dtype=np.int8)
+    histories = [np.zeros((count, (BOARD_CELLS + 1) // 2), dtype=np.int64) for agent in agents]
+    lengths = [np.zeros(count, dtype=np.int64) for agent in agents]
+    for ply in range(BOARD_CELLS):
+        turn = ply % 2
+        symbol = 1 if turn == 0 else -1
+        games = np.nonzero(active)[0]
+        empty = boards[games] == 0
+        #Exploit: value of every next board, taken cells below everything, reversed so argmax finds the last max
+        next_ids = np.where(empty, ids[games, None] + DIGIT[symbol] * POW3, 0)
+        next_values = values[turn][CANONICAL_IDS[next_ids]]
+        next_values[~empty] = -np.inf
+        greedy = BOARD_CELLS - 1 - next_values[:, ::-1].argmax(axis=1)
+        #Explore: a random empty cell
+        noise = rng.random((len(games), BOARD_CELLS))
+        noise[~empty] = -1
+        explore = rng.uniform(0, 1, len(games)) <= agents[turn].epsilon
+        cells = np.where(explore, noise.argmax(axis=1), greedy)
+        boards[games, cells] = symbol
+        ids[games] += DIGIT[symbol] * POW3[cells]
+        histories[turn][games, lengths[turn][games]] = CANONICAL_IDS[ids[games]]
+        lengths[turn][games] += 1
+        won = (boards[games][:, WIN_LINES].sum(axis=2) == 3 * symbol).any(axis=1)
+        winner[games[won]] = symbol
+        active[games[won]] = False
+    return histories, lengths, winner
+
+def feed_rewards(values, history, length, reward, lr, decay_gamma):
+    """
+    Inputs: values indexed by state id, the states each game visited and how many,
+            reward of each game, learning rate and decay
+    Returns: number of updates of each state
+    Objective: feed_reward for a whole batch. Games are walked backwards from their last state together,
+    and games that reach the same state in the same step update it once, toward their average target.
+    """
+    reward = reward.astype(float)
+    visits = np.zeros(NUM_STATES, dtype=np.int64)
+    for step in range(history.shape[1]):
+        games = np.nonzero(length > step)[0]
+        states = history[games, length[games] - 1 - step]
+        hits = np.bincount(states, minlength=NUM_STATES)
+        targets = np.bincount(states, weights=decay_gamma * reward[games], minlength=NUM_STATES)
+        seen = hits > 0
+        values[seen] += lr * (targets[seen] / hits[seen] - values[seen])
+        reward[games] = values[states]
+        visits += hits
+    return visits
+
+def train_worker(values, settings, rounds, batch_size, seed):
+    """
+    Inputs: master values of both agents, (epsilon, lr, decay_gamma) of both agents, number of games,
+            batch size, seed of this worker's random stream
+    Returns: for each agent its values after training and the number of updates of each state
+    Objective: Run play_batched's loop in a worker process of play_parallel
+    """
+    rng = np.random.default_rng(seed)
+    agents = []
+    for epsilon, lr, decay_gamma in settings:
+        agent = Agent('worker', epsilon)
+        agent.lr = lr
+        agent.decay_gamma = decay_gamma
+        agents.append(agent)
+    values = [np.array(agent_values) for agent_values in values]
+    visits = [np.zeros(NUM_STATES, dtype=np.int64) for agent in agents]
+    for start in range(0, rounds, batch_size):
+        count = min(batch_size, rounds - start)
+        histories, lengths, winner = play_batch(agents, values, count, rng)
+        rewards = [np.where(winner == 1, 1, np.where(winner == -1, 0, 0.1)),
+                   np.where(winner == -1, 1, np.where(winner == 1, 0, 0.5))]
+        for i, agent in enumerate(agents):
+            visits[i] += feed_rewards(values[i], histories[i], lengths[i], rewards[i], agent.lr, agent.decay_gamma)
+    return list(zip(values, visits))
+
+class Agent:
+    """
+    We're going to be using Epsilon-Greedy Action Selection.
+    The higher Epsilon is, the more randomness the machine will explore
+    Else, it will exploit the given knowledge of what it knows based on the state value estimations.
+    """
+    def __init__(self, name, epsilon = .3):
+        """
+        Initialize a computer agent:
+        Sets a name, positions played, the variables needed for reward formula, and state value mapping.
+        """
+        self.name = name
+        self.states = [] #Store positions played
+        self.lr = .2
+        self.epsilon = epsilon #Set higher if you want more exploration
+        self.decay_gamma = .9
+        self.states_value = np.zeros(NUM_STATES) #Value of each canonical state id, symmetric boards share one entry
+
+    def getHash(self, board):
+        """
+        Format current board state into hashmap friendly
+        """
+        return board_id(board)
+
+    def choose_action(self, positions, current_board, symbol):
+        """
+        Input: possible positions, the current state, and who's turn it is.
+        Returns: The action/move the agent decides to take based on exploration/exploitation.
+        Action is a tuple pointing at which index to move to.
+        """
+        if np.random.uniform(0, 1) <= self.epsilon:
+            #Explore, we choose a random possible position in available positions
+            index = np.random.choice(len(positions))
+            action = positions[index]
+        else: 
+            #Exploit, we take action based on highest chance of winning given the info we have
+            value_max = -float('inf')
+            boardHash = self.getHash(current_board)
+            for p in positions:
+                #We run through all positions, based on if we met it before, we assign set a value
+                #We want the max value, as it means highest chance of winning, and its respective next move
+                #The next board's id only differs by the digit of the cell played
+                next_boardHash = CANONICAL[boardHash + DIGIT[symbol] * 3 ** (p[0] * BOARD_COLS + p[1])]
+                value = self.states_value[next_boardHash]
+                if value >= value_max:
+                    value_max = value
+                    action = p
+        return action
+
+    def addState(self, state):
+        """
+        Input: the state of the board right now, i.e. where X's and O's are
+        We add the state into the agent's history of all game states, as its canonical id
+        """
+        self.states.append(CANONICAL[state])
+
+    def feed_reward(self, reward):
+        """
+        Input: Reward, integer showing how much value to give to the agent
+        Use value iteration formula to distribute rewards appropriately
+        """
+        for st in reversed(self.states):
+            self.states_value[st] += self.lr * (self.decay_gamma*reward - self.states_value[st])
+            reward = self.states_value[st]
+
+    def savePolicy(self):
+        """
+        This is how the Agent will remember the data of past games.
+        We write a small header and then the value of every state id as float32.
+        The values are copied out first, as they may be memory-mapped from the file being replaced,
+        and the file is written next to it and renamed over it, so a crash never leaves half a policy.
+        """
+        path = 'policy_' + str(self.name)
+        values = np.array(self.states_value, dtype='<f4')
+        fw = open(path + '.tmp', 'wb')
+        fw.write(POLICY_HEADER.pack(POLICY_MAGIC, POLICY_VERSION, NUM_STATES))
+        fw.write(values.tobytes())
+        fw.close()
+        os.replace(path + '.tmp', path)
+
+    def loadPolicy(self, file):
+        """
+        This is how we upload the information to the Agent from a past training iteration.
+        The file is memory-mapped copy-on-write: nothing is read up front, every process serving the same
+        policy shares one copy in the page cache, and training further only copies the pages it changes.
+        Pickled policies from before this format are still read, and savePolicy then rewrites them.
+        """
+        fr = open(file, 'rb')
+        header = fr.read(POLICY_HEADER.size)
+        if header[:len(POLICY_MAGIC)] != POLICY_MAGIC:
+            #Legacy pickle, only load these from files you trust
+            fr.seek(0)
+            self.states_value = legacy_values(pickle.load(fr))
+            fr.close()
+            return
+        fr.close()
+        magic, version, count = POLICY_HEADER.unpack(header)
+        if version != POLICY_VERSION or count != NUM_STATES:
+            raise ValueError(file + ' is not a version ' + str(POLICY_VERSION) + ' policy file')
+        self.states_value = np.memmap(file, dtype='<f4', mode='c', offset=POLICY_HEADER.size, shape=(NUM_STATES,))
+
+    def reset(self):
+        """
+        Reset the memory of boards played up to the current board.
+        """
+        self.states = []
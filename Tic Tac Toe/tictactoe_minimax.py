@@ -0,0 +1,248 @@
+import os
+import numpy as np
+"""
+Used Alpha-Beta Pruning to optimize Minimax algorithm.
+The algorithm checks the maximizers and minimizers and when it isn't possible to beat a better option,
+it stops searching and moves onto the next options.
+
+Tic Tac Toe only has a few thousand reachable positions, so they are all solved once into a table
+and the computer then looks its move up instead of searching.
+"""
+BOARD_COLS = BOARD_ROWS = 3
+BOARD_CELLS = BOARD_COLS * BOARD_ROWS
+AI = 1
+PLAYER = -1
+POW3 = [3 ** cell for cell in range(BOARD_CELLS)]
+DIGIT = {0: 0, AI: 1, PLAYER: 2} #Base 3 digit of each cell value
+#Cells of each row, column and diagonal
+WIN_LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+SOLUTION_FILE = 'minimax_solution.npz' #Where the game script saves the solution table
+
+#Represents the rewards that will influence the bot's decisions
+scores = { 
+    -1: -10,
+    1: 10,
+    0: 0
+}
+class Computer:
+    """
+    Represents the computer we will be playing against
+    """
+    def __init__(self, name, solution_file=None):
+        """
+        Inputs: name, file the solution table is loaded from, or saved to after it is first built.
+                None, the default, keeps the table in memory only, building it takes a fraction of a second.
+        Objective: Initialize Computer with a name
+        """
+        self.name = name
+        self.solution_file = solution_file
+    def bestMove(self, board):
+        """
+        Inputs: state of given board
+        Return: tuple representing the cell the computer should move
+        Objective: Looks the computer's best move up in the solution table.
+        Of the best moves, the first cell is played, the same one the search below would pick.
+        """
+        values, distances, moves = get_solution(self.solution_file)
+        key = board_id(board) * 2
+        if moves[key]:
+            cell = (int(moves[key]) & -int(moves[key])).bit_length() - 1 #Lowest set bit
+            best_move = (cell // BOARD_COLS, cell % BOARD_COLS)
+            board[best_move] = AI
+            return best_move
+        return self.searchMove(board)
+    def searchMove(self, board):
+        """
+        Inputs: state of given board
+        Return: tuple representing the cell the computer should move
+        Objective: Decides computer's best move, using minimax algo, for boards not in the solution table
+        """
+        best_score = -float('inf')
+        for i in range(BOARD_ROWS):
+            for j in range(BOARD_COLS):
+                #Check if spot available
+                if board[i][j] == 0:
+                    board[i][j] = AI
+                    score = minimax(board, 0, False, -float('inf'), float('inf'))
+                    board[i][j] = 0
+                    if score > best_score:
+                        best_score = score
+                        best_move = (i,j)
+        board[best_move] = 1
+        return best_move
+
+def board_id(board):
+    """
+    Input: state of board
+    Returns: the state id of the board, the base 3 number whose digit i is the value of cell i
+    """
+    cells = np.asarray(board).reshape(BOARD_CELLS)
+    return sum(DIGIT[int(cell)] * POW3[i] for i, cell in enumerate(cells))
+
+def line_winner(cells):
+    """
+    Input: list of the 9 cell values
+    Returns: 1 or -1 if X or O has three in a row, else None
+    """
+    for a, b, c in WIN_LINES:
+        if cells[a] != 0 and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return None
+
+def solve(cells, symbol, state_id, table):
+    """
+    Inputs: list of the 9 cell values, symbol of the player to move, state id of the cells,
+            dict of the positions solved so far, keyed by state id * 2 + 1 if the human is to move
+    Returns: (value, distance) of the position, the score from the computer's point of view with perfect play,
+             and how many moves are left until the game ends
+    Objective: Solve the position and every position after it, memoized so each is solved once.
+    The best moves of the player to move are stored as a bitmask of cells: those with the best value,
+    and among them the fastest win, or the slowest loss or draw.
+    """
+    key = state_id * 2 + (symbol == PLAYER)
+    if key in table:
+        return table[key][:2]
+    result = line_winner(cells)
+    if result is None and 0 not in cells:
+        result = 0
+    if result is not None:
+        table[key] = (scores[result], 0, 0)
+        return table[key][:2]
+    outcomes = {}
+    for cell in range(BOARD_CELLS):
+        if cells[cell] == 0:
+            cells[cell] = symbol
+            outcomes[cell] = solve(cells, -symbol, state_id + DIGIT[symbol] * POW3[cell], table)
+            cells[cell] = 0
+    def rank(outcome):
+        value, distance = outcome
+        value *= symbol #From the point of view of the player to move
+        return (value, -distance if value > 0 else distance)
+    best = max(rank(outcome) for outcome in outcomes.values())
+    moves = 0
+    for cell, outcome in outcomes.items():
+        if rank(outcome) == best:
+            moves |= 1 << cell
+            value, distance = outcome
+    table[key] = (value, distance + 1, moves)
+    return table[key][:2]
+
+def build_solution():
+    """
+    Returns: arrays indexed by state id * 2 + 1 if the human is to move: value, distance to the end and best move bitmask.
+             Boards that cannot be reached have no best moves.
+    Objective: Solve every position reachable with either player starting
+    """
+    table = {}
+    solve([0] * BOARD_CELLS, AI, 0, table)
+    solve([0] * BOARD_CELLS, PLAYER, 0, table)
+    values = np.zeros(2 * 3 ** BOARD_CELLS, dtype=np.int8)
+    distances = np.zeros(2 * 3 ** BOARD_CELLS, dtype=np.int8)
+    moves = np.zeros(2 * 3 ** BOARD_CELLS, dtype=np.uint16)
+    for key, (value, distance, best_moves) in table.items():
+        values[key] = value
+        distances[key] = distance
+        moves[key] = best_moves
+    return values, distances, moves
+
+_solution = None
+def get_solution(path=None):
+    """
+    Input: file to load the solution table from, None to only keep it in memory
+    Returns: the arrays of build_solution
+    Objective: Load the table on first use, building and saving it if the file does not exist yet.
+    Every Computer shares the one table. The file is written under a name of this process and renamed over path,
+    so processes starting at the same time never load a file another one is still writing.
+    """
+    global _solution
+    if _solution is None:
+        if path is not None and os.path.exists(path):
+            saved = np.load(path)
+            _solution = (saved['values'], saved['distances'], saved['moves'])
+        else:
+            _solution = build_solution()
+            if path is not None:
+                values, distances, moves = _solution
+                temporary = '%s.%d.tmp' % (path, os.getpid())
+                with open(temporary, 'wb') as fw: #A file object, so savez keeps the name as given
+                    np.savez(fw, values=values, distances=distances, moves=moves)
+                os.replace(temporary, path)
+    return _solution
+
+def checkWinner(board):
+        """
+        Input: state of board
+        Returns: 1 or -1, depending on if X or O won, respectively
+                0 if draw
+                None if game is still in progress
+        Objective: check the result of the board, see the outcome
+        """
+        vert = 0
+        hori = 0
+        draw = True
+        #Horizontal, Vertical, or Draw check
+        for i in range(BOARD_ROWS):
+            for j in range(BOARD_COLS):
+                vert += board[j][i]
+                hori += board[i][j]
+                if board[i][j] == 0:
+                    draw = False
+            if vert == 3 or hori == 3:
+                return 1, True
+            if vert == -3 or hori == -3:
+                return -1, True
+            vert = hori = 0
+        #Two diagonals to check
+        diag_sum1 = sum([board[i, i] for i in range(BOARD_COLS)])
+        diag_sum2 = sum([board[i, BOARD_COLS - i - 1] for i in range(BOARD_COLS)])
+        check_diag = max(abs(diag_sum1), abs(diag_sum2))
+        if check_diag == 3:
+            if diag_sum1 == 3 or diag_sum2 == 3:
+                return 1, True     
+            else:
+                return -1, True
+        if draw:
+            return 0, True
+        return None, False
+def minimax(board, depth, isMaximizing, alpha, beta):
+    """
+    Inputs: state of board, 
+            depth indicating level of tree, 
+            isMaximizing to denote if minimizing or maximizing player, 
+            alpha represents the minimum score that the maximizing player is guaranteed 
+            beta represents the maximum score that the minimizing player is guaranteed
+    Returns: best score from after running minimax on the given board
+    Objective: Runs minimax with alpha beta pruning to check best move for computer
+
+    """
+    current_result, _ = checkWinner(board)
+    if current_result is not None: #If game done, return score
+        return scores[current_result]
+    if isMaximizing: #Finds best move if AI is next, maximize score
+        best_score = -float('inf')
+        for i in range(3):
+            for j in range(3):
+                #Check if spot available, AI turn
+                if board[i][j] == 0:
+                    board[i][j] = AI
+                    score = minimax(board, depth+1, False, alpha, beta)
+                    board[i][j] = 0
+                    best_score = max(score - depth , best_score) #We want the AI to win ASAP
+                    alpha = max(alpha, best_score) #Maximize score, best explored option for maximizer from the current state
+                    if beta <= alpha: #A better option exists so prune 
+                        return best_score
+        return best_score
+    else:
+        best_score = float('inf')
+        for i in range(3):
+            for j in range(3):
+                #Check if spot available, player turn
+                if board[i][j] == 0:
+                    board[i][j] = PLAYER
+                    score = minimax(board, depth+1, True, alpha, beta)
+                    board[i][j] = 0
+                    best_score = min(depth + score, best_score) #We want the AI to lose as slowly as possible
+                    beta = min(beta, best_score) #Minimize score, best explored option for minimizer from the current state
+                    if beta <= alpha:
+                        return best_score
+        return best_score
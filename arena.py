@@ -0,0 +1,412 @@
+"""
+Arena that plays many games between two players and reports which one is stronger, and by how much,
+so an engine change can be checked against the version before it.
+
+Players are given as name:option=value,... for example
+    python arena.py minimax:depth=6 minimax:depth=4 --games 1000 --workers 8
+    python arena.py minimax:movetime=100 mcts:iterations=500
+    python arena.py --game tictactoe agent:policy=policy_p1 minimax
+Connect Four players: minimax (options depth, movetime, nodes, book, table_size), mcts (iterations, movetime,
+batch_size, exploration) and random (seed). Tic Tac Toe players: minimax, agent (policy) and random (seed).
+Any class with the board and search methods of the engines in engine.py can be added to ENGINES.
+
+Every opening is played twice, once with each player moving first, so neither gets the better side more often.
+Openings are a few random moves (--opening-plies), or read from a file of moves played, one opening per line.
+Games run across a process pool. Every process builds both players once and keeps them, with their caches,
+for all the games it plays. The report gives the wins, draws and losses of the first player, its score
+with a 95% confidence interval, the Elo difference that score implies with its interval, the likelihood
+that it is the stronger player, and the time and nodes per move of both players.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'Connect Four'))
+sys.path.insert(0, os.path.join(ROOT, 'Tic Tac Toe'))
+import Minimax as connect_four
+import tictactoe_minimax
+from bitboard import Position, AI, PLAYER, BOARD_COLS, BOARD_CELLS
+from analyze import board_from_moves
+from engine import ConnectFourEngine, TicTacToeEngine
+
+LIMITS = ('depth', 'movetime', 'nodes') #Options passed to search on every move rather than to the engine
+
+class ConnectFourGame:
+    """
+    Rules of Connect Four for the arena, on a bitboard Position. Moves are columns 0-6.
+    """
+    name = 'connect4'
+    cells = BOARD_CELLS
+
+    def start(self):
+        return Position()
+
+    def play(self, state, move, symbol):
+        state.play(move, symbol)
+
+    def legal_moves(self, state):
+        return [col for col in range(BOARD_COLS) if state.can_play(col)]
+
+    def winner(self, state):
+        """
+        Returns: symbol of the winner, 0 for a draw, None while the game is in progress
+        """
+        return state.winner()
+
+class TicTacToeGame:
+    """
+    Rules of Tic Tac Toe for the arena, on a numpy board. Moves are cells 0-8 from the top left.
+    """
+    name = 'tictactoe'
+    cells = 9
+
+    def start(self):
+        return np.zeros((3, 3))
+
+    def play(self, state, move, symbol):
+        state[move // 3][move % 3] = symbol
+
+    def legal_moves(self, state):
+        return [cell for cell in range(9) if state[cell // 3][cell % 3] == 0]
+
+    def winner(self, state):
+        """
+        Returns: symbol of the winner, 0 for a draw, None while the game is in progress
+        """
+        return tictactoe_minimax.checkWinner(state)[0]
+
+GAMES = {'connect4': ConnectFourGame(), 'tictactoe': TicTacToeGame()}
+
+def replay(game, moves):
+    """
+    Inputs: game, list of moves as strings
+    Returns: state of the game after the moves, the first one played by AI
+    """
+    state = game.start()
+    symbol = AI
+    for move in moves:
+        game.play(state, int(move), symbol)
+        symbol = -symbol
+    return state
+
+class RandomEngine:
+    """
+    Plays a random legal move, the baseline every engine should beat
+    """
+    def __init__(self, game, seed=None):
+        self.game = game
+        self.rng = np.random.default_rng(seed)
+
+    def close(self):
+        pass
+
+    def board(self, moves):
+        return moves
+
+    def search(self, board, depth, movetime, nodes):
+        """
+        Returns: a random move, no score, not exact, depth 0 and 0 nodes
+        """
+        moves = self.game.legal_moves(replay(self.game, board))
+        return moves[self.rng.integers(len(moves))], None, False, 0, 0
+
+class MonteCarloEngine:
+    """
+    Plays Connect Four by Monte Carlo tree search, see mcts.py
+    """
+    def __init__(self, iterations=1000, batch_size=64, exploration=1.4):
+        self.computer = connect_four.MonteCarlo('arena', iterations, batch_size=batch_size, exploration=exploration)
+
+    def close(self):
+        self.computer.close()
+
+    def board(self, moves):
+        return board_from_moves(moves)
+
+    def search(self, board, depth, movetime, nodes):
+        """
+        Inputs: board from board, movetime limits each move on top of the iterations, depth and nodes are ignored
+        Returns: the column, no score, not exact, depth 0 and 0 nodes
+        """
+        self.computer.time_limit = None if movetime is None else movetime / 1000
+        _, col = self.computer.bestMove(board)
+        return col, None, False, 0, 0
+
+#Players of each game, name to function building the engine from its options
+ENGINES = {
+    'connect4': {
+        'minimax': lambda book=None, table_size=1 << 18: ConnectFourEngine(book, table_size),
+        'mcts': MonteCarloEngine,
+        'random': lambda seed=None: RandomEngine(GAMES['connect4'], seed),
+    },
+    'tictactoe': {
+        'minimax': lambda: TicTacToeEngine(),
+        'agent': lambda policy: TicTacToeEngine(policy),
+        'random': lambda seed=None: RandomEngine(GAMES['tictactoe'], seed),
+    },
+}
+
+def parse_player(spec):
+    """
+    Input: player as name:option=value,...
+    Returns: name, dict of engine options and dict of search limits, numbers converted to int or float
+    """
+    name, _, rest = spec.partition(':')
+    options = {}
+    limits = {}
+    for item in filter(None, rest.split(',')):
+        key, separator, value = item.partition('=')
+        if not separator:
+            raise ValueError('expected option=value in ' + spec)
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        (limits if key in LIMITS else options)[key] = value
+    return name, options, limits
+
+class Player:
+    """
+    One side of the match: an engine, the limits of its searches and what its moves cost
+    """
+    def __init__(self, game, spec):
+        """
+        Inputs: game name, player as name:option=value,...
+        """
+        name, options, limits = parse_player(spec)
+        if name not in ENGINES[game]:
+            raise ValueError('unknown %s player %s, expected one of %s' % (game, name, ', '.join(ENGINES[game])))
+        self.engine = ENGINES[game][name](**options)
+        self.limits = limits
+
+    def move(self, moves):
+        """
+        Input: list of moves played so far, as strings
+        Returns: the move, seconds it took and nodes searched
+        """
+        start = time.perf_counter()
+        move, _, _, _, nodes = self.engine.search(self.engine.board(moves), self.limits.get('depth'),
+                                               self.limits.get('movetime'), self.limits.get('nodes'))
+        return move, time.perf_counter() - start, nodes
+
+#Game and both players of an arena worker process, set by init_arena and kept between games
+arena = None
+
+def init_arena(game, specs):
+    """
+    Inputs: game name, the two players as name:option=value,...
+    Objective: Build both players once for the process
+    """
+    global arena
+    arena = (GAMES[game], [Player(game, spec) for spec in specs])
+
+def play_game(opening, first):
+    """
+    Inputs: opening moves as a string, index of the player who moves first after the opening (0 or 1)
+    Returns: dict of the score of the first player (1, 0.5 or 0), plies played,
+             and for each player its moves, seconds, nodes and slowest move in seconds
+    Objective: Play the opening, then let the players alternate from the side to move until the game ends
+    """
+    game, players = arena
+    moves = list(opening)
+    state = replay(game, moves)
+    symbol = AI if len(moves) % 2 == 0 else PLAYER
+    costs = [[0, 0.0, 0, 0.0], [0, 0.0, 0, 0.0]]
+    turn = first
+    while game.winner(state) is None:
+        move, seconds, nodes = players[turn].move(moves)
+        game.play(state, move, symbol)
+        moves.append(str(move))
+        cost = costs[turn]
+        cost[0] += 1
+        cost[1] += seconds
+        cost[2] += nodes
+        cost[3] = max(cost[3], seconds)
+        symbol = -symbol
+        turn = 1 - turn
+    winner = game.winner(state)
+    first_symbol = AI if len(opening) % 2 == 0 else PLAYER
+    if winner == 0:
+        score = 0.5
+    else:
+        score = 1.0 if (winner == first_symbol) == (first == 0) else 0.0
+    return {'score': score, 'plies': len(moves), 'costs': costs}
+
+def play_games(tasks):
+    """
+    Input: list of (opening, first) tasks
+    Returns: list of their results, as play_game
+    """
+    return [play_game(opening, first) for opening, first in tasks]
+
+def random_openings(game, count, plies, seed=None):
+    """
+    Inputs: game, number of openings, random moves in each, seed of the random generator
+    Returns: list of openings as strings of moves, none of them already over
+    Objective: Draw random openings, throwing away the ones that end the game. Raises ValueError
+    if plies fill the board, or if so few openings of that length leave the game going that
+    100 tries per opening are not enough.
+    """
+    if not 0 <= plies < game.cells:
+        raise ValueError('openings need 0 to %d plies, %d fill the board' % (game.cells - 1, game.cells))
+    rng = np.random.default_rng(seed)
+    openings = []
+    tries = 0
+    while len(openings) < count:
+        tries += 1
+        if tries > 100 * count:
+            raise ValueError('only %d of %d random openings of %d plies left the game going, use fewer plies'
+                             % (len(openings), count, plies))
+        state = game.start()
+        symbol = AI
+        moves = ''
+        for ply in range(plies):
+            legal = game.legal_moves(state)
+            move = legal[rng.integers(len(legal))]
+            game.play(state, move, symbol)
+            moves += str(move)
+            symbol = -symbol
+            if game.winner(state) is not None:
+                break
+        else:
+            openings.append(moves)
+    return openings
+
+def elo(score):
+    """
+    Input: expected score, between 0 and 1
+    Returns: Elo difference that gives that score, None for 0 or 1 where it is unbounded
+    """
+    if not 0 < score < 1:
+        return None
+    return 400 * math.log10(score / (1 - score))
+
+def summarize(scores):
+    """
+    Input: list of game scores of the first player, 1, 0.5 or 0
+    Returns: dict of its wins, draws and losses, its score with a 95% confidence interval, the Elo difference
+    and its interval, and the likelihood of superiority, the chance that it is the stronger player.
+    The interval is the Wilson score interval, which stays wide for few or one-sided games, where an interval
+    from the spread of the scores would shrink to nothing. It treats the score as a share of wins, which a game
+    score varies no more than, so with draws it is a little wider than it has to be.
+    """
+    scores = np.asarray(scores, dtype=float)
+    games = len(scores)
+    wins = int(np.count_nonzero(scores == 1))
+    losses = int(np.count_nonzero(scores == 0))
+    draws = games - wins - losses
+    mean = float(scores.mean())
+    z = 1.96
+    center = (mean + z * z / (2 * games)) / (1 + z * z / games)
+    margin = z / (1 + z * z / games) * math.sqrt(mean * (1 - mean) / games + z * z / (4 * games * games))
+    low, high = max(center - margin, 0.0), min(center + margin, 1.0)
+    decisive = wins + losses
+    superiority = 0.5 if decisive == 0 else 0.5 * (1 + math.erf((wins - losses) / math.sqrt(2 * decisive)))
+    return {
+        'games': games,
+        'wins': wins,
+        'draws': draws,
+        'losses': losses,
+        'score': mean,
+        'score_interval': [low, high],
+        'elo': elo(mean),
+        'elo_interval': [elo(low), elo(high)],
+        'likelihood_of_superiority': superiority,
+    }
+
+def run_match(game, specs, openings, workers=None, chunk_size=8):
+    """
+    Inputs: game name, the two players, list of openings as strings of moves,
+            number of processes (all cores by default, 1 to play in this process), games per task
+    Returns: dict of the results of the first player (see summarize), the time and nodes per move
+             of each player and how fast the games were played
+    """
+    tasks = [(opening, first) for opening in openings for first in (0, 1)]
+    batches = [tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+    workers = workers or os.cpu_count()
+    start = time.perf_counter()
+    if workers == 1:
+        init_arena(game, specs)
+        results = [result for batch in batches for result in play_games(batch)]
+        for player in arena[1]:
+            player.engine.close()
+    else:
+        with ProcessPoolExecutor(workers, initializer=init_arena, initargs=(game, specs)) as pool:
+            results = [result for batch in pool.map(play_games, batches) for result in batch]
+    seconds = time.perf_counter() - start
+    report = summarize([result['score'] for result in results])
+    players = []
+    for index, spec in enumerate(specs):
+        costs = [result['costs'][index] for result in results]
+        moves = sum(cost[0] for cost in costs)
+        search_seconds = sum(cost[1] for cost in costs)
+        nodes = sum(cost[2] for cost in costs)
+        players.append({
+            'player': spec,
+            'moves': moves,
+            'seconds_per_move': search_seconds / moves if moves else 0.0,
+            'slowest_move_seconds': max(cost[3] for cost in costs),
+            'nodes_per_move': nodes / moves if moves else 0.0,
+            'nodes_per_second': nodes / search_seconds if search_seconds else 0.0,
+        })
+    report['players'] = players
+    report['plies_per_game'] = sum(result['plies'] for result in results) / len(results)
+    report['seconds'] = seconds
+    report['games_per_second'] = len(results) / seconds
+    return report
+
+def print_report(report):
+    """
+    Input: dict from run_match
+    Objective: Print the results for a person to read
+    """
+    first, second = report['players']
+    low, high = report['score_interval']
+    #An Elo difference is unbounded at a score of 0 or 1
+    show = lambda value, score: ('+inf' if score >= 1 else '-inf') if value is None else '%+.0f' % value
+    print('%s vs %s' % (first['player'], second['player']))
+    print('Games %d: +%d =%d -%d' % (report['games'], report['wins'], report['draws'], report['losses']))
+    print('Score %.3f (95%% %.3f to %.3f)' % (report['score'], low, high))
+    elo_low, elo_high = report['elo_interval']
+    print('Elo %s (95%% %s to %s)' % (show(report['elo'], report['score']), show(elo_low, low), show(elo_high, high)))
+    print('Likelihood of superiority %.1f%%' % (100 * report['likelihood_of_superiority']))
+    for player in report['players']:
+        print('%s: %d moves, %.4f s/move (slowest %.4f s), %.0f nodes/move, %.0f nodes/s' % (
+            player['player'], player['moves'], player['seconds_per_move'], player['slowest_move_seconds'],
+            player['nodes_per_move'], player['nodes_per_second']))
+    print('%.1f plies/game, %.2f games/s, %.1f s' % (report['plies_per_game'], report['games_per_second'], report['seconds']))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play two engines against each other and rate the first against the second')
+    parser.add_argument('first', help='player as name:option=value,..., e.g. minimax:depth=6')
+    parser.add_argument('second', help='player it is rated against')
+    parser.add_argument('--game', choices=sorted(GAMES), default='connect4')
+    parser.add_argument('--games', type=int, default=200, help='games to play, each random opening twice')
+    parser.add_argument('--opening-plies', type=int, default=2, help='random moves in each opening')
+    parser.add_argument('--openings', help='file of openings as moves played, one per line, each played twice instead of random ones')
+    parser.add_argument('--seed', type=int, help='seed of the random openings')
+    parser.add_argument('--workers', type=int, help='processes, all cores by default')
+    parser.add_argument('--chunk', type=int, default=8, help='games sent to a process at a time')
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args()
+    if args.openings:
+        with open(args.openings) as fr:
+            openings = [line.strip() for line in fr if line.strip()]
+    else:
+        try:
+            openings = random_openings(GAMES[args.game], (args.games + 1) // 2, args.opening_plies, args.seed)
+        except ValueError as error:
+            parser.error(str(error))
+    report = run_match(args.game, [args.first, args.second], openings, args.workers, args.chunk)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as fw:
+            json.dump(report, fw, indent=2)
@@ -0,0 +1,218 @@
+"""
+Benchmarks for the Connect Four and Tic Tac Toe engines.
+Every run searches the same fixed positions, so results from different versions of the code can be compared.
+Measured: nodes per second and time to move at several depths for the Connect Four search and bestMove,
+time to move for the Tic Tac Toe minimax, self-play rounds per second of the reinforcement learning trainer,
+and how long a policy takes to load.
+
+Results are printed (or written) as JSON. Metric names ending in _per_second are better when higher,
+names ending in _seconds are better when lower. Compare against a saved run with --baseline:
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+exits with status 1 if any metric got worse by more than --threshold.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'Connect Four'))
+sys.path.insert(0, os.path.join(ROOT, 'Tic Tac Toe'))
+import Minimax as connect_four
+import tictactoe_minimax as tic_tac_toe
+import tictactoe_agent as reinforced
+from bitboard import Position, AI
+
+#Connect Four positions as the columns played so far, the computer (X) moved first and is to move again
+CONNECT_FOUR_CORPUS = {
+    'opening': ['', '21', '3500'],
+    'middlegame': ['640240410033', '01043064015540', '4430104612314042'],
+    'endgame': ['62343221615610424325325005', '4346306023550055254532636203'],
+}
+#Tic Tac Toe positions as the cells played so far (0 is the top left, 8 the bottom right), computer to move
+TIC_TAC_TOE_CORPUS = {
+    'opening': ['', '40'],
+    'middlegame': ['0481'],
+    'endgame': ['401352'],
+}
+
+def connect_four_board(moves):
+    """
+    Input: string of columns played, alternating from the computer
+    Returns: numpy board of that position
+    """
+    position = Position()
+    symbol = AI
+    for col in moves:
+        position.play(int(col), symbol)
+        symbol = -symbol
+    return position.to_board()
+
+def tic_tac_toe_board(moves):
+    """
+    Input: string of cells played, alternating from the computer
+    Returns: numpy board of that position
+    """
+    board = np.zeros((3, 3))
+    symbol = AI
+    for cell in moves:
+        board[int(cell) // 3][int(cell) % 3] = symbol
+        symbol = -symbol
+    return board
+
+def best_time(function, repeat, setup=None):
+    """
+    Inputs: function to time, number of runs,
+            setup, untimed function whose result is passed to function on every run, e.g. a fresh Computer
+    Returns: fastest run in seconds and what the last run returned
+    """
+    fastest = float('inf')
+    for run in range(repeat):
+        arguments = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        result = function(*arguments)
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest, result
+
+def bench_connect_four(results, depths, repeat):
+    """
+    Objective: Time the root search and bestMove on every corpus position at each depth, each run with a fresh Computer.
+    The root search is timed on its own with a SearchBudget counting nodes, bestMove includes the exact solver near the end.
+    """
+    for depth in depths:
+        total_nodes = 0
+        total_time = 0
+        new_computer = lambda: connect_four.Computer('benchmark', depth=depth)
+        for phase, games in CONNECT_FOUR_CORPUS.items():
+            phase_time = 0
+            for moves in games:
+                board = connect_four_board(moves)
+                def search(computer):
+                    budget = connect_four.SearchBudget()
+                    computer.searchRoot(connect_four.EvaluatedPosition.from_board(board), depth, budget)
+                    return budget.nodes
+                seconds, nodes = best_time(search, repeat, new_computer)
+                total_nodes += nodes
+                total_time += seconds
+                seconds, _ = best_time(lambda computer: computer.bestMove(board.copy()), repeat, new_computer)
+                phase_time += seconds
+            results['connect4.bestMove.depth%d.%s_seconds' % (depth, phase)] = phase_time / len(games)
+        results['connect4.search.depth%d.nodes' % depth] = total_nodes
+        results['connect4.search.depth%d.nodes_per_second' % depth] = total_nodes / total_time
+    #The numpy search, kept for comparison, is only fast enough at a shallow depth
+    board = connect_four_board(CONNECT_FOUR_CORPUS['opening'][0])
+    seconds, _ = best_time(lambda computer: computer.bestMove(board.copy()), repeat,
+                           lambda: connect_four.Computer('benchmark', bitboard=False, depth=1))
+    results['connect4.numpy.depth1.opening_seconds'] = seconds
+
+def bench_tic_tac_toe(results, repeat):
+    """
+    Objective: Time building the minimax solution table, then the table lookup and the full search on the corpus
+    """
+    def build():
+        tic_tac_toe._solution = None
+        return tic_tac_toe.get_solution(None)
+    seconds, _ = best_time(build, repeat)
+    results['tictactoe.solution.build_seconds'] = seconds
+    computer = tic_tac_toe.Computer('benchmark', solution_file=None)
+    for phase, games in TIC_TAC_TOE_CORPUS.items():
+        lookup_time = search_time = 0
+        for moves in games:
+            board = tic_tac_toe_board(moves)
+            lookup_time += best_time(lambda: computer.bestMove(board.copy()), repeat)[0]
+            search_time += best_time(lambda: computer.searchMove(board.copy()), repeat)[0]
+        results['tictactoe.bestMove.%s_seconds' % phase] = lookup_time / len(games)
+        results['tictactoe.minimax.%s_seconds' % phase] = search_time / len(games)
+
+def bench_reinforced(results, rounds, batched_rounds, repeat):
+    """
+    Objective: Time self-play training, one game at a time and batched, then loading the saved policy.
+    Runs in a temporary directory, as training saves its policy to the current directory.
+    """
+    directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            #Training prints its progress
+            with contextlib.redirect_stdout(io.StringIO()):
+                np.random.seed(0)
+                state = reinforced.State(reinforced.Agent('p1'), reinforced.Agent('p2'))
+                seconds, _ = best_time(lambda: state.play(rounds), repeat)
+                results['rl.play.rounds_per_second'] = rounds / seconds
+                state = reinforced.State(reinforced.Agent('p1'), reinforced.Agent('p2'))
+                seconds, _ = best_time(lambda: state.play_batched(batched_rounds), repeat)
+                results['rl.play_batched.rounds_per_second'] = batched_rounds / seconds
+            def load():
+                agent = reinforced.Agent('computer', epsilon=0)
+                agent.loadPolicy('policy_p1')
+                return agent
+            seconds, _ = best_time(load, repeat)
+            results['rl.loadPolicy_seconds'] = seconds
+        finally:
+            os.chdir(directory)
+
+def compare(results, baseline, threshold):
+    """
+    Inputs: results of this run, results of the baseline run, allowed relative slowdown
+    Returns: list of (metric, baseline value, new value) that got worse by more than threshold
+    """
+    regressions = []
+    for metric, value in sorted(results.items()):
+        old = baseline.get(metric)
+        if not old:
+            continue
+        if metric.endswith('_per_second') and value < old * (1 - threshold):
+            regressions.append((metric, old, value))
+        elif metric.endswith('_seconds') and value > old * (1 + threshold):
+            regressions.append((metric, old, value))
+    return regressions
+
+def run(depths=(2, 4, 6), repeat=3, rounds=2000, batched_rounds=100000):
+    """
+    Inputs: Connect Four search depths, runs per measurement (the fastest counts),
+            rounds of serial and of batched self-play
+    Returns: dict with the machine the benchmark ran on and the results, metric name to value
+    """
+    results = {}
+    bench_connect_four(results, depths, repeat)
+    bench_tic_tac_toe(results, repeat)
+    bench_reinforced(results, rounds, batched_rounds, repeat)
+    machine = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+    return {'machine': machine, 'results': results}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the game engines on a fixed set of positions')
+    parser.add_argument('--output', help='write the JSON results to this file instead of printing them')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative slowdown reported as a regression')
+    parser.add_argument('--depths', type=int, nargs='+', default=[2, 4, 6], help='Connect Four search depths')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the fastest counts')
+    parser.add_argument('--rounds', type=int, default=2000, help='self-play rounds of the serial trainer')
+    parser.add_argument('--batched-rounds', type=int, default=100000, help='self-play rounds of the batched trainer')
+    args = parser.parse_args()
+    report = run(args.depths, args.repeat, args.rounds, args.batched_rounds)
+    if args.output:
+        with open(args.output, 'w') as fw:
+            json.dump(report, fw, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    if args.baseline:
+        with open(args.baseline) as fr:
+            regressions = compare(report['results'], json.load(fr)['results'], args.threshold)
+        for metric, old, new in regressions:
+            print('Regression: %s %.6g -> %.6g' % (metric, old, new), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,249 @@
+"""
+Long-lived engine process that speaks a line-based text protocol on stdin/stdout, so games can be
+driven by a harness or a pool of persistent workers instead of starting Python for every game.
+The engine keeps its transposition table, solution table or policy loaded between commands.
+With --table-file, the Connect Four transposition table is also loaded from that file at startup
+and saved back to it on exit, so the next engine starts with what this one searched.
+
+    python engine.py [--game connect4|tictactoe] [--book FILE] [--policy FILE] [--table-size N] [--table-file FILE] [--workers N]
+
+Commands, one per line:
+    newgame                       start a new game from the empty board, caches are kept
+    position [moves M1 M2 ...]    set the position, the empty board then the moves played
+                                  (Connect Four: columns 0-6, Tic Tac Toe: cells 0-8 from the top left)
+    go [depth N] [movetime MS] [nodes N]
+                                  search the side to move, answered by an info and a bestmove line
+    stop                          end the search in progress early, it still answers with bestmove
+    isready                       answered by readyok once every earlier command is done
+    quit                          exit, stopping the search in progress. At the end of the input
+                                  the engine exits too, once the search in progress answers
+Replies:
+    info depth D nodes N time MS
+    bestmove M score S            the move and its heuristic score for the side to move, positive is good for it,
+                                  without score if the move came from the opening book
+    bestmove M exact S            the move and its exact score, when the position was solved: positive is a win,
+                                  0 a draw. Connect Four counts the mover's discs left at the end (+k wins with
+                                  the k-th last disc), Tic Tac Toe gives 1, 0 or -1. Not on the scale of score
+    error MESSAGE                 for a command that could not be carried out, the engine keeps running
+Commands other than stop, isready and quit wait for the search in progress to finish.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, 'Connect Four'))
+sys.path.insert(0, os.path.join(ROOT, 'Tic Tac Toe'))
+import Minimax as connect_four
+import tictactoe_minimax
+import tictactoe_agent
+from analyze import board_from_moves
+
+class ConnectFourEngine:
+    """
+    Plays Connect Four with one Computer, so its transposition table, history and solver table stay warm
+    """
+    def __init__(self, book=None, table_size=1 << 18, workers=1, table_file=None):
+        self.computer = connect_four.Computer('engine', table_size=table_size, book=book, workers=workers, table_file=table_file)
+
+    def close(self):
+        self.computer.close()
+
+    def board(self, moves):
+        """
+        Input: list of moves as strings, columns 0-6
+        Returns: numpy board of the position, the side to move is AI (1)
+        """
+        return board_from_moves(moves)
+
+    def search(self, board, depth, movetime, nodes):
+        """
+        Inputs: board from board, then the limits of go, None when not given
+        Returns: the column, its score (None from the opening book), True if the score is exact (from the solver),
+                 depth reached and nodes searched
+        Objective: Search by iterative deepening, so stop can end any search early.
+        Without any limit, the search goes to the Computer's default depth.
+        """
+        computer = self.computer
+        computer.time_limit = None if movetime is None else movetime / 1000
+        computer.node_limit = nodes
+        computer.max_depth = depth if depth is not None or movetime is not None or nodes is not None else connect_four.DEPTH
+        _, col = computer.bestMove(board)
+        searched = computer.budget.nodes if computer.budget is not None else 0
+        exact = computer.solved_score is not None
+        return col, computer.score, exact, 0 if computer.budget is None or exact else computer.depth_reached, searched
+
+    def stop(self):
+        self.computer.stop()
+
+class TicTacToeEngine:
+    """
+    Plays Tic Tac Toe from the minimax solution table, or with a trained Agent when given its policy file
+    """
+    def __init__(self, policy=None):
+        self.agent = None
+        if policy is not None:
+            self.agent = tictactoe_agent.Agent('engine', epsilon=0)
+            self.agent.loadPolicy(policy)
+        else:
+            self.computer = tictactoe_minimax.Computer('engine')
+            tictactoe_minimax.get_solution(self.computer.solution_file)
+
+    def close(self):
+        pass
+
+    def board(self, moves):
+        """
+        Input: list of moves as strings, cells 0-8
+        Returns: numpy board of the position, the side to move is 1
+        """
+        board = np.zeros((3, 3))
+        symbol = 1 if len(moves) % 2 == 0 else -1
+        for move in moves:
+            cell = int(move)
+            if not 0 <= cell < 9 or board[cell // 3][cell % 3] != 0:
+                raise ValueError('illegal move ' + move)
+            if tictactoe_minimax.checkWinner(board)[1]:
+                raise ValueError('the game is over before move ' + move)
+            board[cell // 3][cell % 3] = symbol
+            symbol = -symbol
+        if tictactoe_minimax.checkWinner(board)[1]:
+            raise ValueError('the game is over')
+        return board
+
+    def search(self, board, depth, movetime, nodes):
+        """
+        Inputs: board from board, the limits of go are ignored, the answer is a lookup either way
+        Returns: the cell, its score, True if it is exact (the minimax table, not the agent's learned value),
+                 moves left until the end of the game with perfect play (0 for the agent, which does not know it)
+                 and nodes searched (always 0)
+        """
+        if self.agent is not None:
+            positions = [(i, j) for i in range(3) for j in range(3) if board[i][j] == 0]
+            row, col = self.agent.choose_action(positions, board, 1)
+            board[row][col] = 1
+            score = float(self.agent.states_value[tictactoe_agent.CANONICAL[tictactoe_agent.board_id(board)]])
+            return row * 3 + col, score, False, 0, 0
+        values, distances, moves = tictactoe_minimax.get_solution(self.computer.solution_file)
+        key = tictactoe_minimax.board_id(board) * 2
+        row, col = self.computer.bestMove(board)
+        return row * 3 + col, int(values[key]), True, int(distances[key]), 0
+
+    def stop(self):
+        pass
+
+class EngineProcess:
+    """
+    Reads commands, runs every go on a search thread so stop can interrupt it, and writes the replies
+    """
+    def __init__(self, engine, output=sys.stdout):
+        self.engine = engine
+        self.output = output
+        self.lock = threading.Lock() #Replies come from both threads
+        self.moves = []
+        self.thread = None
+
+    def reply(self, line):
+        with self.lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def wait(self):
+        """
+        Objective: Wait for the search in progress, if any, to answer
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def go(self, board, depth, movetime, nodes):
+        """
+        Objective: Search on the search thread and reply with the result
+        """
+        start = time.perf_counter()
+        try:
+            move, score, exact, depth_reached, searched = self.engine.search(board, depth, movetime, nodes)
+        except Exception as error:
+            self.reply('error ' + str(error))
+            return
+        milliseconds = int((time.perf_counter() - start) * 1000)
+        self.reply('info depth %d nodes %d time %d' % (depth_reached or 0, searched, milliseconds))
+        self.reply('bestmove %d' % move + ('' if score is None else ' %s %s' % ('exact' if exact else 'score', score)))
+
+    def command(self, line):
+        """
+        Input: one line of input
+        Returns: False once the engine should exit
+        """
+        words = line.split()
+        if not words:
+            return True
+        name, arguments = words[0], words[1:]
+        if name == 'quit':
+            self.stop()
+            return False
+        if name == 'stop':
+            self.stop()
+            return True
+        self.wait()
+        if name == 'isready':
+            self.reply('readyok')
+        elif name == 'newgame':
+            self.moves = []
+        elif name == 'position':
+            moves = arguments[1:] if arguments[:1] == ['moves'] else arguments
+            self.engine.board(moves) #Raises ValueError on an illegal move
+            self.moves = moves
+        elif name == 'go':
+            limits = {'depth': None, 'movetime': None, 'nodes': None}
+            for key, value in zip(arguments[::2], arguments[1::2]):
+                if key not in limits:
+                    raise ValueError('unknown limit ' + key)
+                limits[key] = int(value)
+            board = self.engine.board(self.moves)
+            self.thread = threading.Thread(target=self.go, args=(board, limits['depth'], limits['movetime'], limits['nodes']))
+            self.thread.start()
+        else:
+            raise ValueError('unknown command ' + name)
+        return True
+
+    def stop(self):
+        """
+        Objective: Stop the search in progress and wait for its answer.
+        Stop is repeated until the search ends, in case it had not started its budget yet.
+        """
+        while self.thread is not None and self.thread.is_alive():
+            self.engine.stop()
+            self.thread.join(0.01)
+        self.thread = None
+
+    def run(self, lines):
+        """
+        Input: iterable of command lines, e.g. sys.stdin
+        """
+        for line in lines:
+            try:
+                if not self.command(line):
+                    break
+            except ValueError as error:
+                self.reply('error ' + str(error))
+        self.wait()
+        self.engine.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Game engine speaking a line-based protocol on stdin/stdout')
+    parser.add_argument('--game', choices=['connect4', 'tictactoe'], default='connect4')
+    parser.add_argument('--book', help='Connect Four opening book file, see Connect Four/book.py')
+    parser.add_argument('--table-size', type=int, default=1 << 18, help='Connect Four transposition table entries')
+    parser.add_argument('--table-file', help='Connect Four transposition table file, loaded at startup and saved on exit')
+    parser.add_argument('--workers', type=int, default=1, help='Connect Four search processes')
+    parser.add_argument('--policy', help='Tic Tac Toe: play with the reinforced learning agent of this policy file instead of minimax')
+    args = parser.parse_args()
+    if args.game == 'connect4':
+        engine = ConnectFourEngine(args.book, args.table_size, args.workers, args.table_file)
+    else:
+        engine = TicTacToeEngine(args.policy)
+    EngineProcess(engine).run(sys.stdin)